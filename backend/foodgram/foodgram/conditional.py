@@ -0,0 +1,186 @@
+import time
+from datetime import datetime, timezone
+from hashlib import md5
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.db import transaction
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def cache_is_shared():
+    """Кэш общий для всех процессов и серверов: memcached или Redis."""
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    return (
+        isinstance(backend, BaseMemcachedCache)
+        or 'redis' in type(backend).__module__
+    )
+
+
+def warn_if_cache_is_process_local(command):
+    """
+    Предупреждает из management-команды, что версии данных, которые
+    она меняет, не дойдут до веб-сервера: кэш не общий.
+    """
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if isinstance(backend, (LocMemCache, DummyCache)):
+        command.stderr.write(command.style.WARNING(
+            f'Кэш {type(backend).__name__} виден только этому процессу: '
+            'веб-сервер не узнает об изменениях до перезапуска. '
+            'Настройте общий кэш (CACHE_BACKEND, CACHE_LOCATION).'
+        ))
+
+
+def get_version(key):
+    """
+    Версия набора данных - время его последнего изменения. Если
+    версии нет в кэше, считаем, что данные изменились только что.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), None)
+        return cache.get(key, time.time())
+    return version
+
+
+def bump_versions(*keys):
+    """Обновляет версии после фиксации текущей транзакции."""
+    transaction.on_commit(
+        lambda: cache.set_many({key: time.time() for key in keys}, None)
+    )
+
+
+def version_to_datetime(version):
+    return datetime.fromtimestamp(version, tz=timezone.utc)
+
+
+class ConditionalResponseMixin:
+    """
+    Поддержка условных запросов (ETag / Last-Modified) для list
+    и retrieve. Если валидаторы совпадают с присланными клиентом,
+    возвращается 304 без обращения к сериализатору. Наследники
+    определяют get_etag_parts() и, при необходимости,
+    get_last_modified() и get_cache_control().
+    """
+    cache_control = {'public': True, 'max_age': 0, 'must_revalidate': True}
+
+    def get_etag_parts(self, request, *args, **kwargs):
+        return None
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return None
+
+    def get_cache_control(self, request):
+        return self.cache_control
+
+    def get_etag(self, request, *args, **kwargs):
+        parts = self.get_etag_parts(request, *args, **kwargs)
+        if parts is None:
+            return None
+        parts = (request.accepted_renderer.format, *parts)
+        return quote_etag(
+            md5(':'.join(map(str, parts)).encode()).hexdigest()
+        )
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request, *args, **kwargs)
+        last_modified = self.get_last_modified(request, *args, **kwargs)
+        last_modified_timestamp = (
+            int(last_modified.timestamp()) if last_modified else None
+        )
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified_timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            if etag:
+                response['ETag'] = etag
+            if last_modified_timestamp:
+                response['Last-Modified'] = http_date(
+                    last_modified_timestamp
+                )
+            patch_cache_control(response, **self.get_cache_control(request))
+            patch_vary_headers(response, ('Accept', 'Authorization'))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class SharedResponseCacheMixin:
+    """
+    Кэширует данные ответов list и retrieve, общие для всех
+    пользователей. Анонимным пользователям общий ответ отдаётся как
+    есть, остальным - если uses_shared_response() разрешает, после
+    наложения личных данных в personalize(). Ключ включает версию
+    данных response_cache_version_key, поэтому любое изменение данных
+    делает старые записи недоступными.
+    """
+    response_cache_version_key = None
+    response_cache_timeout = 300
+    shared_response = False
+
+    def uses_shared_response(self, request):
+        return request.user.is_anonymous
+
+    def personalize(self, request, data):
+        return data
+
+    def get_response_cache_versions(self, request):
+        return (get_version(self.response_cache_version_key),)
+
+    def get_response_cache_key(self, request, *args, **kwargs):
+        params = sorted(
+            (key, sorted(values))
+            for key, values in request.query_params.lists()
+        )
+        parts = (
+            self.get_response_cache_versions(request),
+            self.action,
+            kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+            request.get_host(),
+            request.accepted_renderer.format,
+            params,
+        )
+        return 'response:{}:{}'.format(
+            self.basename,
+            md5(repr(parts).encode()).hexdigest()
+        )
+
+    def cached_shared_response(self, handler, request, *args, **kwargs):
+        if not self.uses_shared_response(request):
+            return handler(request, *args, **kwargs)
+        self.shared_response = True
+        cache_key = self.get_response_cache_key(request, *args, **kwargs)
+        data = cache.get(cache_key)
+        if data is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            cache.set(cache_key, response.data, self.response_cache_timeout)
+        else:
+            response = Response(data)
+        if not request.user.is_anonymous:
+            response.data = self.personalize(request, response.data)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_shared_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_shared_response(
+            super().retrieve, request, *args, **kwargs
+        )
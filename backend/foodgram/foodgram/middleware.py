@@ -0,0 +1,121 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger('foodgram.requests')
+
+
+class QueryRecorder:
+    """Считает SQL-запросы запроса и время их выполнения."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - started_at, sql))
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def slowest(self, amount):
+        return sorted(self.queries, key=lambda query: -query[0])[:amount]
+
+
+def to_ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class RequestMetricsMiddleware:
+    """
+    Замеряет для каждого запроса количество и время SQL-запросов,
+    время работы view и отрисовки ответа. Отдает их в заголовке
+    Server-Timing и пишет строкой JSON в лог foodgram.requests.
+    View может добавить в строку свои поля через request.metrics['extra'].
+    Для медленных запросов дополнительно логирует самые долгие
+    SQL-запросы.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_threshold = settings.REQUEST_METRICS_SLOW_THRESHOLD_MS
+        self.slowest_queries = settings.REQUEST_METRICS_SLOWEST_QUERIES
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request.metrics = {}
+        started_at = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        finished_at = time.perf_counter()
+        self.report(request, response, recorder, started_at, finished_at)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics['view_started_at'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        metrics = request.metrics
+        metrics['render_started_at'] = time.perf_counter()
+
+        def render_finished(rendered_response):
+            metrics['render_finished_at'] = time.perf_counter()
+
+        response.add_post_render_callback(render_finished)
+        return response
+
+    def report(self, request, response, recorder, started_at, finished_at):
+        metrics = request.metrics
+        total = finished_at - started_at
+        timings = {
+            'db': recorder.duration,
+            'total': total,
+        }
+        if 'view_started_at' in metrics:
+            timings['view'] = (
+                metrics.get('render_started_at', finished_at)
+                - metrics['view_started_at']
+            )
+        if 'render_finished_at' in metrics:
+            timings['render'] = (
+                metrics['render_finished_at'] - metrics['render_started_at']
+            )
+        response['Server-Timing'] = ', '.join(
+            '{};dur={}{}'.format(
+                name,
+                to_ms(duration),
+                ';desc="{} queries"'.format(recorder.count)
+                if name == 'db' else ''
+            )
+            for name, duration in timings.items()
+        )
+        line = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': recorder.count,
+        }
+        line.update(
+            {f'{name}_ms': to_ms(duration)
+             for name, duration in timings.items()}
+        )
+        line.update(metrics.get('extra', {}))
+        if to_ms(total) < self.slow_threshold:
+            logger.info(json.dumps(line, ensure_ascii=False))
+            return
+        line['slowest_queries'] = [
+            {'duration_ms': to_ms(duration), 'sql': sql}
+            for duration, sql in recorder.slowest(self.slowest_queries)
+        ]
+        logger.warning(json.dumps(line, ensure_ascii=False))
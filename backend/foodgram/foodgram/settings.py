@@ -46,6 +46,39 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+REQUEST_METRICS = os.getenv('REQUEST_METRICS', default='False') == 'True'
+REQUEST_METRICS_SLOW_THRESHOLD_MS = int(os.getenv('REQUEST_METRICS_SLOW_THRESHOLD_MS', default='500'))
+REQUEST_METRICS_SLOWEST_QUERIES = int(os.getenv('REQUEST_METRICS_SLOWEST_QUERIES', default='5'))
+
+if REQUEST_METRICS:
+    MIDDLEWARE.insert(0, 'foodgram.middleware.RequestMetricsMiddleware')
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'request_metrics': {'format': '%(message)s'},
+        },
+        'handlers': {
+            'request_metrics': {
+                'class': 'logging.StreamHandler',
+                'formatter': 'request_metrics',
+            },
+        },
+        'loggers': {
+            'foodgram.requests': {
+                'handlers': ['request_metrics'],
+                'level': 'INFO',
+                'propagate': False,
+            },
+        },
+    }
+
+INGREDIENT_CATALOGUE = os.getenv('INGREDIENT_CATALOGUE', default='True') == 'True'
+RECIPES_PERSONAL_OVERLAY = os.getenv('RECIPES_PERSONAL_OVERLAY', default='True') == 'True'
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', default='2'))
+IMAGE_UPLOAD_MAX_SIZE = int(os.getenv('IMAGE_UPLOAD_MAX_SIZE', default=str(10 * 1024 * 1024)))
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', default='40000000'))
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -77,6 +110,19 @@ DATABASES = {
     }
 }
 
+# Через кэш gunicorn-воркеры и management-команды узнают об изменениях
+# данных (версии каталога, рецептов, списков покупок), поэтому при
+# развёртывании он должен быть общим: memcached или Redis, например
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache и
+# CACHE_LOCATION=memcached:11211. LocMemCache по умолчанию годится только
+# для разработки в одном процессе; при старте об этом пишется в лог.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
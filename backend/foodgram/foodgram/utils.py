@@ -0,0 +1,10 @@
+from itertools import islice
+
+
+def batched(items, batch_size):
+    """Разбивает итерируемый объект на списки по batch_size элементов."""
+    items = iter(items)
+    batch = list(islice(items, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(items, batch_size))
@@ -0,0 +1,135 @@
+import logging
+from bisect import bisect_left
+from threading import Lock
+from uuid import uuid4
+
+from django.core.cache import cache
+
+from .constants import CATALOGUE_NGRAM_SIZE, CATALOGUE_VERSION_KEY
+from .models import Ingredient
+
+logger = logging.getLogger(__name__)
+
+
+def get_ngrams(text):
+    return {
+        text[i:i + CATALOGUE_NGRAM_SIZE]
+        for i in range(len(text) - CATALOGUE_NGRAM_SIZE + 1)
+    }
+
+
+def invalidate_catalogue():
+    """
+    Помечает каталог устаревшим во всех процессах, которые используют
+    тот же кэш.
+    """
+    cache.set(CATALOGUE_VERSION_KEY, uuid4().hex, None)
+
+
+class IngredientCatalogue:
+    """
+    Каталог ингредиентов в памяти процесса для автодополнения.
+    Хранит отсортированный список названий в нижнем регистре
+    и словарь n-грамм. Версия каталога хранится в общем кэше,
+    поэтому изменение ингредиентов в одном процессе перестраивает
+    каталог во всех остальных.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.version = None
+        self.ingredients = []
+        self.sorted_names = []
+        self.sorted_positions = []
+        self.ngrams = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_version(self):
+        version = cache.get(CATALOGUE_VERSION_KEY)
+        if version is None:
+            cache.add(CATALOGUE_VERSION_KEY, uuid4().hex, None)
+            return cache.get(CATALOGUE_VERSION_KEY, uuid4().hex)
+        return version
+
+    def build(self, version):
+        ingredients = list(
+            Ingredient.objects.values('id', 'name', 'measurement_unit')
+        )
+        lowered = [ingredient['name'].lower() for ingredient in ingredients]
+        order = sorted(range(len(ingredients)), key=lambda i: lowered[i])
+        ngrams = {}
+        for position, name in enumerate(lowered):
+            for ngram in get_ngrams(name):
+                ngrams.setdefault(ngram, set()).add(position)
+        self.ingredients = ingredients
+        self.sorted_names = [lowered[i] for i in order]
+        self.sorted_positions = order
+        self.ngrams = ngrams
+        self.version = version
+        logger.debug(
+            'Каталог ингредиентов перестроен: %s записей.', len(ingredients)
+        )
+
+    def ensure_current(self):
+        version = self.get_version()
+        if version is not None and version == self.version:
+            self.hits += 1
+            return
+        with self.lock:
+            if version != self.version:
+                self.misses += 1
+                self.build(version)
+            else:
+                self.hits += 1
+
+    def all(self):
+        self.ensure_current()
+        return self.ingredients
+
+    def search(self, value, limit):
+        """
+        Возвращает до limit ингредиентов: сначала начинающиеся
+        с value, затем содержащие его, каждая группа по алфавиту.
+        """
+        self.ensure_current()
+        value = value.lower()
+        prefix_positions = []
+        index = bisect_left(self.sorted_names, value)
+        while (
+            index < len(self.sorted_names)
+            and self.sorted_names[index].startswith(value)
+            and len(prefix_positions) < limit
+        ):
+            prefix_positions.append(self.sorted_positions[index])
+            index += 1
+        result = [self.ingredients[i] for i in prefix_positions]
+        if len(result) >= limit:
+            return result
+        if len(value) < CATALOGUE_NGRAM_SIZE:
+            candidates = range(len(self.ingredients))
+        else:
+            candidate_sets = [
+                self.ngrams.get(ngram, set()) for ngram in get_ngrams(value)
+            ]
+            candidates = set.intersection(*candidate_sets)
+        prefix_positions = set(prefix_positions)
+        substring_matches = sorted(
+            (
+                position for position in candidates
+                if position not in prefix_positions
+                and value in self.ingredients[position]['name'].lower()
+            ),
+            key=lambda i: self.ingredients[i]['name'].lower()
+        )
+        result.extend(
+            self.ingredients[i]
+            for i in substring_matches[:limit - len(result)]
+        )
+        return result
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+catalogue = IngredientCatalogue()
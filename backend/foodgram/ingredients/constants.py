@@ -0,0 +1,5 @@
+INGREDIENT_SEARCH_LIMIT = 20
+CATALOGUE_NGRAM_SIZE = 3
+CATALOGUE_VERSION_KEY = 'ingredient_catalogue_version'
+IMPORT_BATCH_SIZE = 1000
+INGREDIENTS_MAX_AGE = 300
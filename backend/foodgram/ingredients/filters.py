@@ -1,23 +1,27 @@
-from django.db.models import Q
-from django.db.models.functions import Lower
+from django.db.models import Case, IntegerField, Value, When
 from django_filters.rest_framework import CharFilter, FilterSet
 
 from .models import Ingredient
 
 
 class IngredientFilter(FilterSet):
-    """Наш фильтр для поиска ингредиентов в списке выпадающих имен."""
+    """
+    Наш фильтр для поиска ингредиентов в списке выпадающих имен.
+    Сначала идут ингредиенты, начинающиеся с запроса, затем те,
+    что содержат его в середине названия.
+    """
     name = CharFilter(method='our_filter_method')
 
     def our_filter_method(self, queryset, name, value):
         if not value:
             return queryset
-        starts_with_query = Q(name__istartswith=value)
-        contains_query = Q(name__icontains=value)
-        return queryset.filter(starts_with_query | contains_query).order_by(
-            Lower('name').desc(),
-            'name'
-        )
+        return queryset.filter(name__icontains=value).annotate(
+            match_rank=Case(
+                When(name__istartswith=value, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField()
+            )
+        ).order_by('match_rank', 'name')
 
     class Meta:
         model = Ingredient
@@ -1,33 +1,117 @@
 import csv
+import json
 import os
+import time
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from foodgram.conditional import warn_if_cache_is_process_local
+from foodgram.utils import batched
+from ingredients.catalogue import invalidate_catalogue
+from ingredients.constants import IMPORT_BATCH_SIZE
 from ingredients.models import Ingredient
 
 
+def read_csv(file_path):
+    with open(file_path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            yield row[0], row[1]
+
+
+def read_json(file_path):
+    with open(file_path, encoding='utf-8') as f:
+        for item in json.load(f):
+            yield item['name'], item['measurement_unit']
+
+
 class Command(BaseCommand):
-    """Импортирует данные об ингредиентах из *.csv-файла."""
+    """
+    Импортирует данные об ингредиентах из *.csv или *.json-файла.
+    Файл читается пачками; ингредиенты, уже существующие с той же
+    парой (название, единица измерения), пропускаются, поэтому
+    повторный запуск только дополняет каталог.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'file_path',
+            nargs='?',
+            default=os.path.join(
+                os.path.dirname(__file__),
+                *([os.pardir] * 1), 'data',
+                'ingredients.csv'
+            ),
+            help='Путь к *.csv или *.json-файлу с ингредиентами.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help='Количество строк, обрабатываемых за один запрос.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать новые ингредиенты, ничего не записывая.'
+        )
+
+    def get_rows(self, file_path):
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension == '.csv':
+            return read_csv(file_path)
+        if extension == '.json':
+            return read_json(file_path)
+        raise CommandError(
+            f'Неподдерживаемый формат файла: {extension}. '
+            'Ожидается *.csv или *.json.'
+        )
+
+    def import_batch(self, batch, seen, dry_run):
+        batch = [row for row in dict.fromkeys(batch) if row not in seen]
+        seen.update(batch)
+        existing = set(
+            Ingredient.objects
+            .filter(name__in={name for name, _ in batch})
+            .values_list('name', 'measurement_unit')
+        )
+        new_ingredients = [
+            Ingredient(name=name, measurement_unit=measurement_unit)
+            for name, measurement_unit in batch
+            if (name, measurement_unit) not in existing
+        ]
+        if not dry_run:
+            Ingredient.objects.bulk_create(new_ingredients)
+        return len(new_ingredients)
 
     def handle(self, *args, **options):
-        file_name = 'ingredients.csv'
-        file_path = os.path.join(
-            os.path.dirname(__file__),
-            *([os.pardir] * 1), 'data',
-            file_name
+        file_path = options['file_path']
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        if not os.path.exists(file_path):
+            raise CommandError(f'Файл {file_path} не найден.')
+
+        self.stdout.write(
+            'Загружаем данные об ингредиентах из '
+            f'{os.path.basename(file_path)}...'
         )
-        if Ingredient.objects.exists():
-            self.stderr.write('Данные об ингредиентах уже загружены.')
-            return
+        started_at = time.perf_counter()
+        total = created = 0
+        seen = set()
+        with transaction.atomic():
+            for batch in batched(self.get_rows(file_path), batch_size):
+                total += len(batch)
+                created += self.import_batch(batch, seen, dry_run)
+        elapsed = time.perf_counter() - started_at
+        if created and not dry_run:
+            invalidate_catalogue()
+            warn_if_cache_is_process_local(self)
 
+        action = 'Будет добавлено' if dry_run else 'Добавлено'
         self.stdout.write(
-            f'Загружаем данные об ингредиентах из {file_name}...'
+            f'{action} {created} из {total} строк '
+            f'за {elapsed:.2f} с ({total / max(elapsed, 1e-6):.0f} строк/с).'
         )
-        with open(file_path, newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                _, _ = Ingredient.objects.update_or_create(
-                    name=row[0],
-                    measurement_unit=row[1]
-                )
         self.stdout.write('Загрузка завершена!')
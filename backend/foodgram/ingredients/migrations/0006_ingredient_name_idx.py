@@ -0,0 +1,40 @@
+# Generated by Django 3.2.19 on 2026-10-18 19:55
+
+from django.db import migrations, models
+
+UPPER_NAME_INDEX = 'ingredient_name_upper_like_idx'
+
+
+def create_upper_name_index(apps, schema_editor):
+    """
+    Индекс для istartswith на PostgreSQL: Django ищет по
+    UPPER("name"::text) LIKE UPPER(...), поэтому нужен индекс по
+    выражению с text_pattern_ops.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS {} ON ingredients_ingredient '
+        '(UPPER("name"::text) text_pattern_ops)'.format(UPPER_NAME_INDEX)
+    )
+
+
+def drop_upper_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS {}'.format(UPPER_NAME_INDEX))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0005_remove_ingredient_amount'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['name'], name='ingredient_name_idx'),
+        ),
+        migrations.RunPython(create_upper_name_index, drop_upper_name_index),
+    ]
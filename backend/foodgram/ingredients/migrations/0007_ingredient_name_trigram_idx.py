@@ -0,0 +1,39 @@
+from django.db import migrations
+
+TRIGRAM_NAME_INDEX = 'ingredient_name_upper_trgm_idx'
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+    Триграммный GIN-индекс для поиска по подстроке на PostgreSQL:
+    icontains превращается в UPPER("name"::text) LIKE UPPER('%...%').
+    На других СУБД поиск выполняется тем же запросом без индекса.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS {} ON ingredients_ingredient '
+        'USING gin (UPPER("name"::text) gin_trgm_ops)'.format(
+            TRIGRAM_NAME_INDEX
+        )
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'DROP INDEX IF EXISTS {}'.format(TRIGRAM_NAME_INDEX)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0006_ingredient_name_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -18,6 +18,9 @@ class Ingredient(models.Model):
         ordering = ('id',)
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        indexes = [
+            models.Index(fields=('name',), name='ingredient_name_idx')
+        ]
 
     def __str__(self):
         return f'{self.name}, {self.measurement_unit}'
@@ -0,0 +1,62 @@
+import json
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .catalogue import IngredientCatalogue
+from .constants import INGREDIENT_SEARCH_LIMIT
+from .models import Ingredient
+
+INGREDIENTS_URL = '/api/ingredients/'
+
+
+class IngredientSearchTest(TestCase):
+    """Поиск ингредиентов по названию."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'Соль {i:02}', measurement_unit='г')
+            for i in range(INGREDIENT_SEARCH_LIMIT + 10)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, name):
+        response = self.client.get(INGREDIENTS_URL, {'name': name})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_catalogue_search_is_limited(self):
+        self.assertEqual(
+            len(self.search('Соль').data), INGREDIENT_SEARCH_LIMIT
+        )
+
+    @override_settings(INGREDIENT_CATALOGUE=False)
+    def test_database_search_is_limited(self):
+        self.assertEqual(
+            len(self.search('Соль').data), INGREDIENT_SEARCH_LIMIT
+        )
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+    }})
+    @mock.patch('ingredients.views.catalogue', IngredientCatalogue())
+    def test_catalogue_search_without_cache(self):
+        self.assertEqual(
+            len(self.search('Соль').data), INGREDIENT_SEARCH_LIMIT
+        )
+
+    @override_settings(MIDDLEWARE=[
+        'foodgram.middleware.RequestMetricsMiddleware', *settings.MIDDLEWARE
+    ])
+    def test_catalogue_stats_are_logged(self):
+        with self.assertLogs('foodgram.requests', 'INFO') as logs:
+            self.search('Соль')
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(set(line['catalogue']), {'hits', 'misses'})
@@ -1,15 +1,54 @@
+from django.conf import settings
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from foodgram.conditional import ConditionalResponseMixin
+
+from .catalogue import catalogue
+from .constants import INGREDIENT_SEARCH_LIMIT, INGREDIENTS_MAX_AGE
 from .filters import IngredientFilter
 from .models import Ingredient
 from .serializers import IngredientSerializer
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
-    """Вьюсет для вывода списка доступных ингредиентов."""
+class IngredientViewSet(ConditionalResponseMixin, ReadOnlyModelViewSet):
+    """
+    Вьюсет для вывода списка доступных ингредиентов.
+    Список и поиск отдаются из каталога в памяти процесса. Если
+    каталог выключен (INGREDIENT_CATALOGUE=False), поиск идёт в базе
+    через IngredientFilter с тем же ранжированием, индексами и не
+    более чем INGREDIENT_SEARCH_LIMIT результатами. Счётчики попаданий
+    и промахов каталога попадают в строку лога foodgram.requests.
+    """
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = []
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
+    cache_control = {'public': True, 'max_age': INGREDIENTS_MAX_AGE}
+
+    def get_etag_parts(self, request, *args, **kwargs):
+        return (catalogue.get_version(),)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list' and self.request.query_params.get('name'):
+            return queryset[:INGREDIENT_SEARCH_LIMIT]
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if not settings.INGREDIENT_CATALOGUE:
+            return super().list(request, *args, **kwargs)
+        return self.conditional(self.list_from_catalogue, request)
+
+    def list_from_catalogue(self, request):
+        name = request.query_params.get('name')
+        if name:
+            ingredients = catalogue.search(name, INGREDIENT_SEARCH_LIMIT)
+        else:
+            ingredients = catalogue.all()
+        metrics = getattr(request, 'metrics', None)
+        if metrics is not None:
+            metrics['extra'] = {'catalogue': catalogue.stats()}
+        return Response(IngredientSerializer(ingredients, many=True).data)
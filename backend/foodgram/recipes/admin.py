@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Favorites, IngredientsInRecipe, Recipe, ShoppingList
+from .models import (Favorites, IngredientsInRecipe, Recipe, RecipeScore,
+                     ShoppingList)
 
 
 class IngredientsAdminInline(admin.TabularInline):
@@ -30,7 +31,7 @@ class AdminRecipe(admin.ModelAdmin):
 
     @admin.display(description='Количество в избранном')
     def favorites_amount(self, obj):
-        return obj.favorite.count()
+        return obj.favorites_count
 
 
 @admin.register(IngredientsInRecipe)
@@ -68,3 +69,15 @@ class AdminShoppingList(admin.ModelAdmin):
     )
     list_filter = ('user', 'recipe',)
     search_fields = ('user', 'recipe',)
+
+
+@admin.register(RecipeScore)
+class AdminRecipeScore(admin.ModelAdmin):
+    """Наша модель рейтинга рецептов в админке."""
+    list_display = (
+        'recipe',
+        'week_score',
+        'updated_at',
+    )
+    readonly_fields = ('recipe', 'week_score', 'updated_at',)
+    search_fields = ('recipe__name',)
@@ -1,7 +1,34 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
     verbose_name = 'Управление рецептами'
+
+    def ready(self):
+        from foodgram.conditional import cache_is_shared
+
+        from . import signals  # noqa
+        from .exceptions import MissingFontError
+        from .shopping_list import register_font
+
+        if not cache_is_shared():
+            logger.warning(
+                'Кэш %s не общий для процессов: веб-сервер и команды '
+                'не увидят изменений друг друга. Для развёртывания '
+                'настройте memcached или Redis (CACHE_BACKEND, '
+                'CACHE_LOCATION).', settings.CACHES['default']['BACKEND']
+            )
+        try:
+            register_font()
+        except MissingFontError as error:
+            logger.warning(
+                'Шрифт для pdf не найден: %s. '
+                'Список покупок будет выгружаться в *.txt.', error
+            )
@@ -7,3 +7,40 @@ START_X_COORD_PAGE = 100
 START_Y_COORD_PAGE = 750
 LIST_Y_COORD_PAGE = 700
 DELTA_Y_COORD_PAGE = 20
+END_Y_COORD_PAGE = 50
+FONT_NAME = 'Arial'
+FONT_FILE_NAME = 'ArialRegular.ttf'
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24
+SHOPPING_LIST_CACHE_MAX_SIZE = 1024 * 1024
+RECIPE_COUNT_CACHE_TIMEOUT = 30
+RECIPE_COUNT_ESTIMATE_MIN = 100000
+RECIPES_VERSION_KEY = 'recipes_version'
+POPULARITY_VERSION_KEY = 'popularity_version'
+TRENDING_VERSION_KEY = 'trending_version'
+ORDERING_VERSION_KEYS = {
+    'popular': POPULARITY_VERSION_KEY,
+    'trending': TRENDING_VERSION_KEY,
+}
+USER_STATE_VERSION_KEY = 'user_state_version:{user_id}'
+AUTHOR_FIELDS = frozenset(('username', 'email', 'first_name', 'last_name'))
+RECIPES_ANONYMOUS_MAX_AGE = 60
+RECIPES_RESPONSE_CACHE_TIMEOUT = 300
+PERSONAL_STATE_KEY = 'personal_state:{user_id}:{version}'
+PERSONAL_STATE_CACHE_TIMEOUT = 86400
+PERSONAL_FILTERS = ('is_favorited', 'is_in_shopping_cart')
+THUMBNAIL_WIDTHS = (320, 640)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_UPLOAD_TO = 'recipes/thumbnails'
+BASE64_CHUNK_SIZE = 64 * 1024
+IMAGE_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+GC_MEDIA_MIN_AGE = 3600
+GC_MEDIA_BATCH_SIZE = 1000
+RECIPE_ORDERING_CHOICES = (
+    ('new', 'Сначала новые'),
+    ('popular', 'Больше всего в избранном'),
+    ('trending', 'Популярные за неделю'),
+)
+TRENDING_WINDOW_DAYS = 7
+TRENDING_FAVORITE_WEIGHT = 2
+TRENDING_CART_WEIGHT = 1
+SCORE_BATCH_SIZE = 1000
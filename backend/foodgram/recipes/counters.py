@@ -0,0 +1,48 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Subscribe, User
+
+from .models import Favorites, Recipe, ShoppingList
+
+# (модель со счётчиком, поле счётчика, считаемая модель, поле связи)
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorites, 'recipe'),
+    (Recipe, 'carts_count', ShoppingList, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'subscribers_count', Subscribe, 'author'),
+)
+
+
+def shift_counter(model, pk, field, delta):
+    """Атомарно изменяет счётчик, не опуская его ниже нуля."""
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def count_related(related_model, related_field):
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(**{related_field: OuterRef('pk')})
+            .order_by()
+            .values(related_field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def repair_counter(model, field, related_model, related_field):
+    """
+    Пересчитывает счётчик одним UPDATE для строк, где он разошёлся
+    с фактическим количеством. Возвращает число исправленных строк.
+    """
+    drifted = model.objects.annotate(
+        actual_count=count_related(related_model, related_field)
+    ).exclude(**{field: F('actual_count')})
+    return model.objects.filter(pk__in=drifted.values('pk')).update(
+        **{field: count_related(related_model, related_field)}
+    )
@@ -0,0 +1,85 @@
+import base64
+import binascii
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+from PIL import Image
+from rest_framework import serializers
+
+from .constants import BASE64_CHUNK_SIZE, IMAGE_FORMATS
+from .thumbnails import get_thumbnail_urls
+
+BASE64_MARKER = ';base64,'
+
+
+class ThumbnailsField(serializers.ReadOnlyField):
+    """Адреса миниатюр изображения рецепта по ширине."""
+
+    def to_representation(self, value):
+        return get_thumbnail_urls(value, self.context.get('request'))
+
+
+class StreamedBase64ImageField(serializers.ImageField):
+    """
+    Изображение в base64. Строка декодируется частями сразу во
+    временный файл, а Pillow читает только заголовок: формат и
+    размеры. Так в памяти не держится полная копия изображения,
+    а слишком большие файлы и «бомбы декомпрессии» отклоняются
+    до декодирования пикселей.
+    """
+    default_error_messages = {
+        'invalid_image': 'Загрузите корректное изображение в base64.',
+        'too_large': 'Размер изображения не должен превышать {max_size} байт.',
+        'too_many_pixels': (
+            'Изображение не должно содержать больше {max_pixels} пикселей.'
+        ),
+    }
+
+    def to_internal_value(self, data):
+        if data == '':
+            return None
+        if not isinstance(data, str):
+            self.fail('invalid_image')
+        start = data.find(BASE64_MARKER, 0, 100)
+        start = 0 if start == -1 else start + len(BASE64_MARKER)
+        encoded_size = len(data) - start
+        if encoded_size // 4 * 3 > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.fail('too_large', max_size=settings.IMAGE_UPLOAD_MAX_SIZE)
+        upload = tempfile.TemporaryFile()
+        try:
+            self.decode_to_file(data, start, upload)
+            extension = self.validate_header(upload)
+        except Exception:
+            upload.close()
+            raise
+        return File(upload, name=f'{uuid.uuid4()}.{extension}')
+
+    def decode_to_file(self, data, start, file):
+        decoded_size = 0
+        for position in range(start, len(data), BASE64_CHUNK_SIZE):
+            chunk = data[position:position + BASE64_CHUNK_SIZE]
+            try:
+                decoded = base64.b64decode(chunk, validate=True)
+            except (binascii.Error, ValueError):
+                self.fail('invalid_image')
+            file.write(decoded)
+            decoded_size += len(decoded)
+        if not decoded_size:
+            self.fail('invalid_image')
+        file.seek(0)
+
+    def validate_header(self, file):
+        try:
+            with Image.open(file) as image:
+                image_format = image.format
+                width, height = image.size
+        except (OSError, Image.DecompressionBombError):
+            self.fail('invalid_image')
+        if image_format not in IMAGE_FORMATS:
+            self.fail('invalid_image')
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            self.fail('too_many_pixels', max_pixels=settings.IMAGE_MAX_PIXELS)
+        file.seek(0)
+        return IMAGE_FORMATS[image_format]
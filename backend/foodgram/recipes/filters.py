@@ -1,5 +1,7 @@
+from django.db.models import F
 from django_filters.rest_framework import FilterSet, filters
 
+from .constants import RECIPE_ORDERING_CHOICES
 from .models import Recipe, Tag
 
 
@@ -15,6 +17,10 @@ class RecipeFilter(FilterSet):
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_boolean'
     )
+    ordering = filters.ChoiceFilter(
+        choices=RECIPE_ORDERING_CHOICES,
+        method='filter_ordering'
+    )
 
     def filter_boolean(self, queryset, name, value):
         user = self.request.user
@@ -28,11 +34,21 @@ class RecipeFilter(FilterSet):
                 return queryset.filter(**{field_name: user})
         return queryset
 
+    def filter_ordering(self, queryset, name, value):
+        if value == 'popular':
+            return queryset.order_by('-favorites_count', '-id')
+        if value == 'trending':
+            return queryset.filter(score__week_score__gt=0).annotate(
+                week_score=F('score__week_score')
+            ).order_by('-week_score', '-id')
+        return queryset
+
     class Meta:
         model = Recipe
         fields = (
             'tags',
             'author',
             'is_favorited',
-            'is_in_shopping_cart'
+            'is_in_shopping_cart',
+            'ordering'
         )
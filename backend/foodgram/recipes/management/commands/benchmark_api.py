@@ -0,0 +1,225 @@
+import json
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from itertools import combinations
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from ingredients.models import Ingredient
+from recipes.models import Recipe
+from tags.models import Tag
+from users.models import User
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    values = sorted(values)
+    index = max(0, -(-len(values) * percent // 100) - 1)
+    return values[int(index)]
+
+
+COLD_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    """
+    Замеряет задержку (p50/p95), количество SQL-запросов и пиковое
+    выделение памяти для публичных эндпоинтов API на текущей базе.
+    Базу удобно заполнить командой seed_data. Результаты сохраняются
+    в JSON, чтобы сравнивать прогоны между собой.
+    По умолчанию кэш подменяется на DummyCache, чтобы каждый запрос
+    доходил до базы и сериализаторов; --cache warm замеряет ответы
+    из кэша после прогрева.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--cache',
+            choices=('cold', 'warm'),
+            default='cold',
+            help='cold - без кэша, warm - с настроенным кэшем.'
+        )
+        parser.add_argument(
+            '--output',
+            default='benchmark.json',
+            help='Файл для результатов в формате JSON.'
+        )
+        parser.add_argument(
+            '--search',
+            default='сол',
+            help='Строка для поиска ингредиентов.'
+        )
+
+    def request(self, method, url, data):
+        response = getattr(self.client, method)(url, data, format='json')
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def request_once(self, method, url, data, rollback):
+        if not rollback:
+            return self.request(method, url, data)
+        response = None
+        try:
+            with transaction.atomic():
+                response = self.request(method, url, data)
+                raise Rollback
+        except Rollback:
+            pass
+        return response
+
+    def measure(self, name, method, url, data=None, rollback=False):
+        for _ in range(self.warmup):
+            self.request_once(method, url, data, rollback)
+        timings = []
+        for _ in range(self.iterations):
+            started_at = time.perf_counter()
+            self.request_once(method, url, data, rollback)
+            timings.append((time.perf_counter() - started_at) * 1000)
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            response = self.request_once(method, url, data, rollback)
+        tracemalloc.start()
+        self.request_once(method, url, data, rollback)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result = {
+            'name': name,
+            'method': method.upper(),
+            'url': url,
+            'params': data if method == 'get' else None,
+            'status': response.status_code,
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'queries': queries.count,
+            'peak_memory_kb': round(peak_memory / 1024, 1),
+        }
+        self.stdout.write(
+            '{name:<58} {status} p50={p50_ms:>8} p95={p95_ms:>8} '
+            'queries={queries:>4} memory={peak_memory_kb}KB'.format(**result)
+        )
+        return result
+
+    def get_user(self):
+        user = (
+            User.objects
+            .filter(shopping_list__isnull=False, subscribing__isnull=False)
+            .order_by('id')
+            .first()
+        ) or User.objects.order_by('id').first()
+        if user is None:
+            raise CommandError(
+                'База пуста. Заполните ее командой seed_data.'
+            )
+        return user
+
+    def recipe_filters(self, user):
+        tag_slugs = list(Tag.objects.values_list('slug', flat=True)[:2])
+        available = {
+            'tags': tag_slugs,
+            'author': user.id,
+            'is_favorited': 1,
+            'is_in_shopping_cart': 1,
+        }
+        for size in range(len(available) + 1):
+            for keys in combinations(available, size):
+                yield {key: available[key] for key in keys}
+
+    def recipe_payload(self):
+        return {
+            'name': 'Рецепт для замера',
+            'text': 'Описание рецепта для замера.',
+            'cooking_time': 10,
+            'tags': list(Tag.objects.values_list('id', flat=True)[:2]),
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 100}
+                for ingredient_id in Ingredient.objects.values_list(
+                    'id', flat=True
+                )[:5]
+            ],
+        }
+
+    def handle(self, *args, **options):
+        self.iterations = options['iterations']
+        self.warmup = options['warmup']
+        if self.iterations < 1:
+            raise CommandError('--iterations должен быть больше нуля.')
+        if options['cache'] == 'cold':
+            with override_settings(CACHES=COLD_CACHES):
+                self.run(options)
+        else:
+            self.run(options)
+
+    def run(self, options):
+        user = self.get_user()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(user)
+        results = []
+
+        for params in self.recipe_filters(user):
+            name = 'recipes list ' + (
+                ','.join(params) if params else 'no filters'
+            )
+            results.append(self.measure(name, 'get', '/api/recipes/', params))
+        recipe = Recipe.objects.order_by('-id').first()
+        if recipe is not None:
+            results.append(self.measure(
+                'recipe detail', 'get', f'/api/recipes/{recipe.id}/'
+            ))
+        results.append(self.measure(
+            'ingredients search', 'get', '/api/ingredients/',
+            {'name': options['search']}
+        ))
+        results.append(self.measure(
+            'subscriptions', 'get', '/api/users/subscriptions/',
+            {'recipes_limit': 3}
+        ))
+        results.append(self.measure(
+            'download shopping cart', 'get',
+            '/api/recipes/download_shopping_cart/'
+        ))
+        payload = self.recipe_payload()
+        results.append(self.measure(
+            'recipe create', 'post', '/api/recipes/', payload, rollback=True
+        ))
+        own_recipe = user.recipes.order_by('id').first()
+        if own_recipe is not None:
+            results.append(self.measure(
+                'recipe update', 'patch', f'/api/recipes/{own_recipe.id}/',
+                payload, rollback=True
+            ))
+
+        report = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'iterations': self.iterations,
+            'warmup': self.warmup,
+            'cache': options['cache'],
+            'results': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(f'Результаты сохранены в {options["output"]}')
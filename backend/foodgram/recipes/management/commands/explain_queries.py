@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from ingredients.models import Ingredient
+from recipes.constants import PAGINATION_SIZE
+from recipes.models import IngredientsInRecipe, Recipe
+from users.models import Subscribe, User
+
+
+class Command(BaseCommand):
+    """
+    Выводит планы выполнения (EXPLAIN) для нагруженных запросов:
+    фильтров рецептов, поиска ингредиентов и списка покупок.
+    Запустите до и после миграций, чтобы сравнить планы.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Выполнить запросы (EXPLAIN ANALYZE, только PostgreSQL).'
+        )
+        parser.add_argument(
+            '--search',
+            default='сол',
+            help='Строка для поиска ингредиентов.'
+        )
+
+    def get_queries(self, search):
+        user = User.objects.order_by('id').first()
+        recipe = Recipe.objects.order_by('id').first()
+        queries = {
+            'Ингредиенты: name__istartswith': Ingredient.objects.filter(
+                name__istartswith=search
+            ),
+            'Рецепты: ordering=popular': Recipe.objects.order_by(
+                '-favorites_count', '-id'
+            )[:PAGINATION_SIZE],
+            'Рецепты: ordering=trending': Recipe.objects.filter(
+                score__week_score__gt=0
+            ).order_by('-score__week_score', '-id')[:PAGINATION_SIZE],
+        }
+        if recipe is not None:
+            queries['Избранное: по рецепту'] = (
+                recipe.favorite.values('user_id')
+            )
+            queries['Список покупок: по рецепту'] = (
+                recipe.shopping_list.values('user_id')
+            )
+        if user is None:
+            return queries
+        queries.update({
+            'Рецепты: автор': Recipe.objects.filter(author=user),
+            'Рецепты: в избранном': Recipe.objects.filter(
+                favorite__user=user
+            ),
+            'Рецепты: в списке покупок': Recipe.objects.filter(
+                shopping_list__user=user
+            ),
+            'Подписчики автора': Subscribe.objects.filter(author=user),
+            'Список покупок: агрегация': (
+                IngredientsInRecipe.objects
+                .filter(recipe__shopping_list__user=user)
+                .values('ingredient__name', 'ingredient__measurement_unit')
+                .annotate(total_amount=Sum('amount'))
+                .order_by('ingredient__name')
+            ),
+        })
+        return queries
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options['analyze']:
+            explain_options['analyze'] = True
+        for title, queryset in self.get_queries(options['search']).items():
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
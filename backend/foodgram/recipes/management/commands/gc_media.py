@@ -0,0 +1,84 @@
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from foodgram.utils import batched
+from recipes.constants import (GC_MEDIA_BATCH_SIZE, GC_MEDIA_MIN_AGE,
+                               THUMBNAIL_UPLOAD_TO)
+from recipes.models import Recipe
+
+
+def walk_files(storage, directory):
+    if not storage.exists(directory):
+        return
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield os.path.join(directory, name)
+    for name in directories:
+        yield from walk_files(storage, os.path.join(directory, name))
+
+
+class Command(BaseCommand):
+    """
+    Удаляет изображения рецептов и миниатюры, на которые не ссылается
+    ни один рецепт. Файлы моложе --min-age не трогаются: они могут
+    принадлежать рецепту, транзакция которого ещё не завершена.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=GC_MEDIA_MIN_AGE,
+            help='Минимальный возраст удаляемого файла в секундах.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=GC_MEDIA_BATCH_SIZE,
+            help='Количество файлов, удаляемых за один проход.'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, сколько файлов будет удалено.'
+        )
+
+    def get_referenced(self):
+        referenced = set()
+        recipes = Recipe.objects.values_list('image', 'thumbnails')
+        for image, thumbnails in recipes.iterator():
+            if image:
+                referenced.add(image)
+            referenced.update(
+                name for key, name in thumbnails.items() if key != 'source'
+            )
+        return referenced
+
+    def get_orphans(self, storage, referenced, min_age):
+        deadline = timezone.now() - timedelta(seconds=min_age)
+        directories = (Recipe.image.field.upload_to, THUMBNAIL_UPLOAD_TO)
+        for directory in directories:
+            for name in walk_files(storage, directory):
+                if name in referenced:
+                    continue
+                if storage.get_modified_time(name) > deadline:
+                    continue
+                yield name
+
+    def handle(self, *args, **options):
+        storage = Recipe.image.field.storage
+        referenced = self.get_referenced()
+        orphans = self.get_orphans(storage, referenced, options['min_age'])
+        removed = 0
+        for batch in batched(orphans, options['batch_size']):
+            if not options['dry_run']:
+                for name in batch:
+                    storage.delete(name)
+            removed += len(batch)
+        action = 'будет удалено' if options['dry_run'] else 'удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Ссылок на файлы: {len(referenced)}, {action} файлов: {removed}.'
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.thumbnails import executor, render_thumbnails_task
+
+
+class Command(BaseCommand):
+    """
+    Строит миниатюры для рецептов, у которых их нет или они
+    устарели: например, загруженных до появления миниатюр или
+    потерянных при перезапуске сервера до окончания обработки.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Перестроить миниатюры всех рецептов.'
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='').values_list(
+            'id', 'image', 'thumbnails'
+        )
+        recipe_ids = [
+            recipe_id for recipe_id, image, thumbnails in recipes.iterator()
+            if options['force'] or thumbnails.get('source') != image
+        ]
+        list(executor.map(render_thumbnails_task, recipe_ids))
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры построены для {len(recipe_ids)} рецептов.'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from foodgram.conditional import bump_versions, warn_if_cache_is_process_local
+from recipes.constants import POPULARITY_VERSION_KEY
+from recipes.counters import COUNTERS, repair_counter
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает денормализованные счётчики рецептов и пользователей:
+    избранное, списки покупок, рецепты и подписчиков. Нужна после
+    массовых загрузок в обход моделей и для исправления расхождений.
+    """
+
+    def handle(self, *args, **options):
+        for model, field, related_model, related_field in COUNTERS:
+            with transaction.atomic():
+                repaired = repair_counter(
+                    model, field, related_model, related_field
+                )
+            self.stdout.write(
+                f'{model.__name__}.{field}: исправлено строк: {repaired}'
+            )
+        bump_versions(POPULARITY_VERSION_KEY)
+        warn_if_cache_is_process_local(self)
@@ -0,0 +1,101 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from foodgram.conditional import bump_versions, warn_if_cache_is_process_local
+from foodgram.utils import batched
+from recipes.constants import (SCORE_BATCH_SIZE, TRENDING_CART_WEIGHT,
+                               TRENDING_FAVORITE_WEIGHT, TRENDING_VERSION_KEY,
+                               TRENDING_WINDOW_DAYS)
+from recipes.models import Favorites, RecipeScore, ShoppingList
+
+
+def count_since(model, recipe_ids, since):
+    return dict(
+        model.objects.filter(recipe_id__in=recipe_ids, created_at__gte=since)
+        .order_by()
+        .values('recipe_id')
+        .annotate(total=Count('pk'))
+        .values_list('recipe_id', 'total')
+    )
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает рейтинг рецептов за последние дни (сортировка
+    ordering=trending). Пересчитываются только рецепты, у которых уже
+    есть рейтинг или были добавления в избранное и списки покупок за
+    это время; каждая пачка - отдельная транзакция. Запускайте по
+    расписанию, например раз в несколько минут из cron.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window-days',
+            type=int,
+            default=TRENDING_WINDOW_DAYS,
+            help='За сколько последних дней считать рейтинг.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SCORE_BATCH_SIZE,
+            help='Количество рецептов в одной транзакции.'
+        )
+
+    def get_candidates(self, since):
+        candidates = set(RecipeScore.objects.values_list('pk', flat=True))
+        for model in (Favorites, ShoppingList):
+            candidates.update(
+                model.objects.filter(created_at__gte=since)
+                .values_list('recipe_id', flat=True)
+                .distinct()
+            )
+        return sorted(candidates)
+
+    @transaction.atomic
+    def refresh_batch(self, recipe_ids, since):
+        favorites = count_since(Favorites, recipe_ids, since)
+        carts = count_since(ShoppingList, recipe_ids, since)
+        scores = {
+            recipe_id: (
+                favorites.get(recipe_id, 0) * TRENDING_FAVORITE_WEIGHT
+                + carts.get(recipe_id, 0) * TRENDING_CART_WEIGHT
+            )
+            for recipe_id in recipe_ids
+        }
+        RecipeScore.objects.filter(
+            pk__in=[pk for pk, score in scores.items() if not score]
+        ).delete()
+        existing = RecipeScore.objects.in_bulk(
+            [pk for pk, score in scores.items() if score]
+        )
+        now = timezone.now()
+        for pk, recipe_score in existing.items():
+            recipe_score.week_score = scores[pk]
+            recipe_score.updated_at = now
+        RecipeScore.objects.bulk_update(
+            existing.values(), ['week_score', 'updated_at']
+        )
+        RecipeScore.objects.bulk_create([
+            RecipeScore(recipe_id=pk, week_score=score)
+            for pk, score in scores.items()
+            if score and pk not in existing
+        ])
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        since = timezone.now() - timedelta(days=options['window_days'])
+        candidates = self.get_candidates(since)
+        for batch in batched(candidates, options['batch_size']):
+            self.refresh_batch(batch, since)
+        bump_versions(TRENDING_VERSION_KEY)
+        warn_if_cache_is_process_local(self)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для {len(candidates)} рецептов '
+            f'за {time.perf_counter() - started_at:.1f} с.'
+        ))
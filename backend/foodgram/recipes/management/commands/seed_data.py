@@ -0,0 +1,196 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from foodgram.utils import batched
+from ingredients.models import Ingredient
+from recipes.models import Favorites, IngredientsInRecipe, Recipe, ShoppingList
+from tags.models import Tag
+from users.models import Subscribe, User
+
+SEED_PASSWORD = 'seed-password'
+
+
+class Command(BaseCommand):
+    """
+    Заполняет базу детерминированными синтетическими данными
+    для нагрузочного тестирования: пользователи, теги, рецепты
+    с ингредиентами, избранное, списки покупок и подписки.
+    Одинаковые параметры и --seed дают одинаковый набор данных.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--tags', type=int, default=10)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=10,
+            help='Максимальное количество ингредиентов в рецепте.'
+        )
+        parser.add_argument(
+            '--tags-per-recipe', type=int, default=3,
+            help='Максимальное количество тегов у рецепта.'
+        )
+        parser.add_argument(
+            '--favorites-per-user', type=int, default=20,
+            help='Максимальное количество рецептов в избранном.'
+        )
+        parser.add_argument(
+            '--carts-per-user', type=int, default=5,
+            help='Максимальное количество рецептов в списке покупок.'
+        )
+        parser.add_argument(
+            '--subscriptions-per-user', type=int, default=10,
+            help='Максимальное количество подписок пользователя.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def bulk_create(self, model, objects):
+        started_at = time.perf_counter()
+        total = 0
+        for batch in batched(objects, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            total += len(batch)
+        elapsed = time.perf_counter() - started_at
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {total} '
+            f'за {elapsed:.1f} с.'
+        )
+
+    def new_ids(self, model, last_id):
+        """
+        Идентификаторы только что созданных записей. bulk_create
+        возвращает их не на всех СУБД, поэтому читаем из базы.
+        """
+        return list(
+            model.objects
+            .filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+    def last_id(self, model):
+        return model.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+
+    def generate_users(self, prefix, count):
+        password = make_password(SEED_PASSWORD)
+        for i in range(count):
+            username = f'{prefix}_{i}'
+            yield User(
+                username=username,
+                email=f'{username}@example.com',
+                first_name=f'Имя{i}',
+                last_name=f'Фамилия{i}',
+                password=password
+            )
+
+    def generate_recipes(self, rng, user_ids, count):
+        for i in range(count):
+            yield Recipe(
+                author_id=rng.choice(user_ids),
+                name=f'Рецепт {i}',
+                text=f'Описание рецепта {i}.',
+                cooking_time=rng.randint(1, 240)
+            )
+
+    def generate_recipe_tags(self, rng, recipe_ids, tag_ids, max_tags):
+        through = Recipe.tags.through
+        for recipe_id in recipe_ids:
+            for tag_id in rng.sample(
+                tag_ids, rng.randint(1, min(max_tags, len(tag_ids)))
+            ):
+                yield through(recipe_id=recipe_id, tag_id=tag_id)
+
+    def generate_ingredients(self, rng, recipe_ids, ingredient_ids,
+                             max_ingredients):
+        for recipe_id in recipe_ids:
+            for ingredient_id in rng.sample(
+                ingredient_ids,
+                rng.randint(1, min(max_ingredients, len(ingredient_ids)))
+            ):
+                yield IngredientsInRecipe(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=rng.randint(1, 1000)
+                )
+
+    def generate_pairs(self, model, rng, user_ids, target_ids, max_count,
+                       target_field):
+        for user_id in user_ids:
+            count = rng.randint(0, min(max_count, len(target_ids)))
+            for target_id in rng.sample(target_ids, count):
+                if target_field == 'author_id' and target_id == user_id:
+                    continue
+                yield model(user_id=user_id, **{target_field: target_id})
+
+    def create_tags(self, count):
+        tag_ids = list(Tag.objects.values_list('id', flat=True))
+        self.bulk_create(Tag, (
+            Tag(name=f'Тег {i}', slug=f'tag-{i}', color=f'#{i:06x}')
+            for i in range(len(tag_ids), count)
+            if not Tag.objects.filter(slug=f'tag-{i}').exists()
+        ))
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        if self.batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+        rng = random.Random(options['seed'])
+        prefix = f'seed{options["seed"]}'
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(
+                f'Данные с --seed {options["seed"]} уже загружены. '
+                'Укажите другой --seed.'
+            )
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients_csv', stdout=self.stdout)
+        ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+        started_at = time.perf_counter()
+
+        tag_ids = self.create_tags(options['tags'])
+
+        last_user_id = self.last_id(User)
+        self.bulk_create(User, self.generate_users(prefix, options['users']))
+        user_ids = self.new_ids(User, last_user_id)
+
+        last_recipe_id = self.last_id(Recipe)
+        self.bulk_create(Recipe, self.generate_recipes(
+            rng, user_ids, options['recipes']
+        ))
+        recipe_ids = self.new_ids(Recipe, last_recipe_id)
+
+        self.bulk_create(Recipe.tags.through, self.generate_recipe_tags(
+            rng, recipe_ids, tag_ids, options['tags_per_recipe']
+        ))
+        self.bulk_create(IngredientsInRecipe, self.generate_ingredients(
+            rng, recipe_ids, ingredient_ids,
+            options['ingredients_per_recipe']
+        ))
+        self.bulk_create(Favorites, self.generate_pairs(
+            Favorites, rng, user_ids, recipe_ids,
+            options['favorites_per_user'], 'recipe_id'
+        ))
+        self.bulk_create(ShoppingList, self.generate_pairs(
+            ShoppingList, rng, user_ids, recipe_ids,
+            options['carts_per_user'], 'recipe_id'
+        ))
+        self.bulk_create(Subscribe, self.generate_pairs(
+            Subscribe, rng, user_ids, user_ids,
+            options['subscriptions_per_user'], 'author_id'
+        ))
+        call_command('recount', stdout=self.stdout)
+        self.stdout.write(
+            f'Готово за {time.perf_counter() - started_at:.1f} с. '
+            f'Пароль пользователей: {SEED_PASSWORD}'
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.19 on 2026-10-18 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_favorites_shoppinglist_recipe_user_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Дата и время последнего изменения рецепта', verbose_name='дата изменения'),
+        ),
+    ]
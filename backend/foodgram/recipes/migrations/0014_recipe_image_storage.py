@@ -0,0 +1,20 @@
+# Generated by Django 3.2.19 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Красивый рисунок, иллюстрирующий рецепт', storage=recipes.storage.ContentAddressedStorage(), upload_to='recipes/images', verbose_name='изображение'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.19 on 2026-10-18 20:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ('recipes.Recipe', 'favorites_count', 'recipes.Favorites', 'recipe'),
+    ('recipes.Recipe', 'carts_count', 'recipes.ShoppingList', 'recipe'),
+    ('users.User', 'recipes_count', 'recipes.Recipe', 'author'),
+    ('users.User', 'subscribers_count', 'users.Subscribe', 'author'),
+)
+
+
+def fill_counters(apps, schema_editor):
+    """Заполняет новые счётчики по уже существующим данным."""
+    for model_name, field, related_name, related_field in COUNTERS:
+        related_model = apps.get_model(related_name)
+        apps.get_model(model_name).objects.update(**{
+            field: Coalesce(
+                Subquery(
+                    related_model.objects.filter(
+                        **{related_field: OuterRef('pk')}
+                    )
+                    .order_by()
+                    .values(related_field)
+                    .annotate(total=Count('pk'))
+                    .values('total')
+                ),
+                0
+            )
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_recipe_image_storage'),
+        ('users', '0009_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Сколько пользователей добавили рецепт в список покупок', verbose_name='количество в списках покупок'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Сколько пользователей добавили рецепт в избранное', verbose_name='количество в избранном'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.19 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeScore',
+            fields=[
+                ('recipe', models.OneToOneField(help_text='Рецепт, для которого посчитан рейтинг', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score', serialize=False, to='recipes.recipe', verbose_name='рецепт')),
+                ('week_score', models.PositiveIntegerField(default=0, help_text='Добавления в избранное и списки покупок за неделю', verbose_name='рейтинг за неделю')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Когда рейтинг был пересчитан', verbose_name='дата пересчёта')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинги рецептов',
+            },
+        ),
+        migrations.AddField(
+            model_name='favorites',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, help_text='Когда рецепт добавлен в избранное', null=True, verbose_name='дата добавления'),
+        ),
+        migrations.AddField(
+            model_name='shoppinglist',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, help_text='Когда рецепт добавлен в список покупок', null=True, verbose_name='дата добавления'),
+        ),
+        migrations.AddIndex(
+            model_name='favorites',
+            index=models.Index(fields=['created_at'], name='favorite_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-favorites_count', '-id'], name='recipe_favorites_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppinglist',
+            index=models.Index(fields=['created_at'], name='shopping_list_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-week_score', '-recipe'], name='recipe_score_week_idx'),
+        ),
+    ]
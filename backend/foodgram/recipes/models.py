@@ -8,6 +8,7 @@ from users.models import User
 from .constants import (AMOUNT_INGREDIENT_MAX_VALUE,
                         AMOUNT_INGREDIENT_MIN_VALUE, COOKING_TIME_MAX_VALUE,
                         COOKING_TIME_MIN_VALUE)
+from .storage import ContentAddressedStorage
 
 
 class Recipe(models.Model):
@@ -28,8 +29,16 @@ class Recipe(models.Model):
         verbose_name='изображение',
         blank=True,
         upload_to='recipes/images',
+        storage=ContentAddressedStorage(),
         help_text='Красивый рисунок, иллюстрирующий рецепт'
     )
+    thumbnails = models.JSONField(
+        verbose_name='миниатюры изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Пути к уменьшенным копиям изображения по ширине'
+    )
     text = models.TextField(
         verbose_name='текстовое описание',
         help_text='Длинное и подробное описание рецепта'
@@ -57,11 +66,34 @@ class Recipe(models.Model):
         ],
         help_text='Время, необходимое для приготовления блюда в минутах'
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='количество в избранном',
+        default=0,
+        editable=False,
+        help_text='Сколько пользователей добавили рецепт в избранное'
+    )
+    carts_count = models.PositiveIntegerField(
+        verbose_name='количество в списках покупок',
+        default=0,
+        editable=False,
+        help_text='Сколько пользователей добавили рецепт в список покупок'
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='дата изменения',
+        auto_now=True,
+        help_text='Дата и время последнего изменения рецепта'
+    )
 
     class Meta:
         ordering = ('-id',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=('-favorites_count', '-id'),
+                name='recipe_favorites_count_idx'
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -119,6 +151,12 @@ class Favorites(models.Model):
         related_name='favorite',
         help_text='Название рецепта'
     )
+    created_at = models.DateTimeField(
+        verbose_name='дата добавления',
+        auto_now_add=True,
+        null=True,
+        help_text='Когда рецепт добавлен в избранное'
+    )
 
     class Meta:
         ordering = ('id',)
@@ -130,6 +168,16 @@ class Favorites(models.Model):
                 name='unique_favorite'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='favorite_recipe_user_idx'
+            ),
+            models.Index(
+                fields=('created_at',),
+                name='favorite_created_at_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.user} добавил рецепт "{self.recipe}" в Избранное.'
@@ -151,6 +199,12 @@ class ShoppingList(models.Model):
         related_name='shopping_list',
         help_text='Название рецепта'
     )
+    created_at = models.DateTimeField(
+        verbose_name='дата добавления',
+        auto_now_add=True,
+        null=True,
+        help_text='Когда рецепт добавлен в список покупок'
+    )
 
     class Meta:
         ordering = ('id',)
@@ -162,7 +216,56 @@ class ShoppingList(models.Model):
                 name='unique_shopping_list'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('recipe', 'user'),
+                name='shopping_list_recipe_user_idx'
+            ),
+            models.Index(
+                fields=('created_at',),
+                name='shopping_list_created_at_idx'
+            )
+        ]
 
     def __str__(self):
         return (f'{self.user} добавил рецепт "{self.recipe}"'
                 ' в Список своих покупок.')
+
+
+class RecipeScore(models.Model):
+    """
+    Наша модель рейтинга рецепта за последние дни. Строки есть только
+    у рецептов с ненулевым рейтингом; таблицу пересчитывает команда
+    refresh_recipe_scores.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        verbose_name='рецепт',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='score',
+        help_text='Рецепт, для которого посчитан рейтинг'
+    )
+    week_score = models.PositiveIntegerField(
+        verbose_name='рейтинг за неделю',
+        default=0,
+        help_text='Добавления в избранное и списки покупок за неделю'
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='дата пересчёта',
+        auto_now=True,
+        help_text='Когда рейтинг был пересчитан'
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(
+                fields=('-week_score', '-recipe'),
+                name='recipe_score_week_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe}: {self.week_score}'
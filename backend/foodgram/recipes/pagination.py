@@ -0,0 +1,126 @@
+from functools import partial
+from hashlib import md5
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from .constants import (PAGINATION_SIZE, RECIPE_COUNT_CACHE_TIMEOUT,
+                        RECIPE_COUNT_ESTIMATE_MIN)
+from .models import Recipe
+
+USER_SPECIFIC_FILTERS = ('is_favorited', 'is_in_shopping_cart')
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+    Постраничная пагинация по номеру страницы, как ожидает фронтенд.
+    Если в запросе передан параметр cursor (для первой страницы -
+    пустой), включается пагинация по курсору: без COUNT(*) и OFFSET,
+    с постоянной стоимостью каждой страницы. Курсор следует сортировке
+    queryset, а если она не задана явно - cursor_ordering.
+    """
+    page_size = PAGINATION_SIZE
+    cursor_query_param = CursorPagination.cursor_query_param
+    cursor_ordering = '-id'
+
+    def get_cursor_paginator(self, queryset):
+        paginator = CursorPagination()
+        paginator.page_size = self.page_size
+        paginator.ordering = (
+            tuple(queryset.query.order_by) or self.cursor_ordering
+        )
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.get_cursor_paginator(queryset)
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class SubscriptionPagination(PageNumberOrCursorPagination):
+    """Пагинация подписок: авторы упорядочены по id."""
+    cursor_ordering = 'id'
+
+
+def get_estimated_recipe_count():
+    """
+    Оценка количества рецептов по статистике планировщика PostgreSQL.
+    Возвращает None на других СУБД и для небольших таблиц, где
+    дешевле и точнее посчитать COUNT(*).
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [Recipe._meta.db_table]
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] < RECIPE_COUNT_ESTIMATE_MIN:
+        return None
+    return row[0]
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который кэширует количество объектов на короткое время."""
+
+    def __init__(self, *args, count_cache_key, use_estimate=False,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_cache_key = count_cache_key
+        self.use_estimate = use_estimate
+
+    @cached_property
+    def count(self):
+        count = cache.get(self.count_cache_key)
+        if count is not None:
+            return count
+        if self.use_estimate:
+            count = get_estimated_recipe_count()
+        if count is None:
+            count = super().count
+        cache.set(self.count_cache_key, count, RECIPE_COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class RecipePagination(PageNumberOrCursorPagination):
+    """
+    Пагинация рецептов. Количество рецептов для каждого набора
+    фильтров кэшируется на RECIPE_COUNT_CACHE_TIMEOUT секунд, а для
+    списка без фильтров на PostgreSQL берется оценка планировщика.
+    """
+
+    def get_filter_params(self, request):
+        return sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key not in (self.page_query_param, 'limit')
+            for value in sorted(values)
+        )
+
+    def get_count_cache_key(self, request, filter_params):
+        key = repr(filter_params)
+        if any(name in USER_SPECIFIC_FILTERS for name, _ in filter_params):
+            key += f':{request.user.pk}'
+        return 'recipe_count:' + md5(key.encode()).hexdigest()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        filter_params = self.get_filter_params(request)
+        self.django_paginator_class = partial(
+            CachedCountPaginator,
+            count_cache_key=self.get_count_cache_key(request, filter_params),
+            use_estimate=not filter_params
+        )
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+
+from foodgram.conditional import get_version
+from users.models import Subscribe
+
+from .constants import (PERSONAL_STATE_CACHE_TIMEOUT, PERSONAL_STATE_KEY,
+                        USER_STATE_VERSION_KEY)
+from .models import Favorites, ShoppingList
+
+
+def get_personal_state(user):
+    """
+    Наборы id избранных рецептов, рецептов в корзине и авторов,
+    на которых подписан пользователь. Кэшируются до смены версии
+    его состояния.
+    """
+    version = get_version(USER_STATE_VERSION_KEY.format(user_id=user.id))
+    cache_key = PERSONAL_STATE_KEY.format(user_id=user.id, version=version)
+    state = cache.get(cache_key)
+    if state is None:
+        state = (
+            set(Favorites.objects.filter(user=user)
+                .values_list('recipe_id', flat=True)),
+            set(ShoppingList.objects.filter(user=user)
+                .values_list('recipe_id', flat=True)),
+            set(Subscribe.objects.filter(user=user)
+                .values_list('author_id', flat=True)),
+        )
+        cache.set(cache_key, state, PERSONAL_STATE_CACHE_TIMEOUT)
+    return state
+
+
+def apply_personal_state(data, state):
+    """Проставляет личные флаги в общем ответе по рецептам."""
+    favorites, shopping_list, subscriptions = state
+    recipes = data['results'] if 'results' in data else [data]
+    for recipe in recipes:
+        recipe['is_favorited'] = recipe['id'] in favorites
+        recipe['is_in_shopping_cart'] = recipe['id'] in shopping_list
+        recipe['author']['is_subscribed'] = (
+            recipe['author']['id'] in subscriptions
+        )
+    return data
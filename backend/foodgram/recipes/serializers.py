@@ -1,7 +1,5 @@
-from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
-from django.db.models import F
-from drf_extra_fields.fields import Base64ImageField
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
 from ingredients.models import Ingredient
@@ -12,7 +10,9 @@ from users.serializers import ModifiedUserSerializer
 from .constants import (AMOUNT_INGREDIENT_MAX_VALUE,
                         AMOUNT_INGREDIENT_MIN_VALUE, COOKING_TIME_MAX_VALUE,
                         COOKING_TIME_MIN_VALUE)
+from .fields import StreamedBase64ImageField, ThumbnailsField
 from .models import IngredientsInRecipe, Recipe
+from .shopping_list import invalidate_recipe_shopping_lists
 
 
 class RecipeSerializer(serializers.ModelSerializer):
@@ -25,12 +25,13 @@ class RecipeSerializer(serializers.ModelSerializer):
     name = serializers.CharField(
         max_length=200
     )
-    image = Base64ImageField(
+    image = StreamedBase64ImageField(
         max_length=None,
         use_url=True,
         allow_null=True,
         required=False
     )
+    thumbnails = ThumbnailsField()
     text = serializers.CharField()
     cooking_time = serializers.IntegerField()
 
@@ -44,26 +45,30 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'thumbnails',
             'text',
             'cooking_time',
         )
         model = Recipe
 
     def get_ingredients(self, obj):
-        recipe = obj
-        return recipe.ingredients.annotate(
-            amount=F('ingredients_in_recipe__amount')
-        ).values(
-            'id',
-            'name',
-            'measurement_unit',
-            'amount',
-        )
+        return [
+            {
+                'id': ingredient_in_recipe.ingredient.id,
+                'name': ingredient_in_recipe.ingredient.name,
+                'measurement_unit':
+                    ingredient_in_recipe.ingredient.measurement_unit,
+                'amount': ingredient_in_recipe.amount,
+            }
+            for ingredient_in_recipe in obj.ingredients_in_recipe.all()
+        ]
 
     def get_is_favorited(self, obj):
         request = self.context['request']
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = request.user
         return user.favorite.filter(recipe_id=obj.pk).exists()
 
@@ -71,9 +76,16 @@ class RecipeSerializer(serializers.ModelSerializer):
         request = self.context['request']
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = request.user
         return user.shopping_list.filter(recipe_id=obj.pk).exists()
 
+    def to_representation(self, instance):
+        if hasattr(instance, 'is_author_subscribed'):
+            instance.author.is_subscribed = instance.is_author_subscribed
+        return super().to_representation(instance)
+
 
 class IngredientsInRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для модели IngredientsInRecipe."""
@@ -101,6 +113,8 @@ class IngredientForCreateSerializer(serializers.ModelSerializer):
 
 class RecipeCreateUpdateSerializer(RecipeSerializer):
     """Наш сериализатор для создания/обновления рецепта."""
+    UPDATE_FIELDS = ('name', 'text', 'image', 'cooking_time', 'updated_at')
+
     ingredients = IngredientForCreateSerializer(
         many=True,
         read_only=True
@@ -118,39 +132,63 @@ class RecipeCreateUpdateSerializer(RecipeSerializer):
                         ' Время приготовления должно быть <= 32000.'}
     )
 
-    def process_ingredients(self, recipe, ingredients_data):
-        ingredient_ids = [
-            ingredient_data.get('id') for ingredient_data in ingredients_data
-        ]
-        ingredients = Ingredient.objects.filter(id__in=ingredient_ids)
-        bulk_create_data = []
-        for ingredient_data in ingredients_data:
-            ingredient_id = ingredient_data.get('id')
-            amount = ingredient_data.get('amount')
-            try:
-                ingredient = ingredients.get(id=ingredient_id)
-            except ObjectDoesNotExist:
-                continue
-            bulk_create_data.append(
-                IngredientsInRecipe(
-                    recipe=recipe,
-                    ingredient=ingredient,
-                    amount=amount
-                )
+    def process_ingredients(self, recipe, ingredients):
+        IngredientsInRecipe.objects.bulk_create([
+            IngredientsInRecipe(
+                recipe=recipe,
+                ingredient=ingredient,
+                amount=amount
             )
-        with transaction.atomic():
-            IngredientsInRecipe.objects.bulk_create(bulk_create_data)
+            for ingredient, amount in ingredients
+        ])
 
+    def update_ingredients(self, recipe, ingredients):
+        """
+        Приводит ингредиенты рецепта к новому списку, изменяя только
+        добавленные, удаленные и те, у которых изменилось количество.
+        Возвращает True, если что-то изменилось.
+        """
+        existing = {
+            ingredient_in_recipe.ingredient_id: ingredient_in_recipe
+            for ingredient_in_recipe in recipe.ingredients_in_recipe.all()
+        }
+        new_amounts = {
+            ingredient.id: int(amount) for ingredient, amount in ingredients
+        }
+        removed_ids = existing.keys() - new_amounts.keys()
+        added = [
+            (ingredient, amount) for ingredient, amount in ingredients
+            if ingredient.id not in existing
+        ]
+        changed = []
+        for ingredient_id, ingredient_in_recipe in existing.items():
+            amount = new_amounts.get(ingredient_id)
+            if amount is not None and amount != ingredient_in_recipe.amount:
+                ingredient_in_recipe.amount = amount
+                changed.append(ingredient_in_recipe)
+        if removed_ids:
+            IngredientsInRecipe.objects.filter(
+                recipe=recipe,
+                ingredient_id__in=removed_ids
+            ).delete()
+        if changed:
+            IngredientsInRecipe.objects.bulk_update(changed, ['amount'])
+        if added:
+            self.process_ingredients(recipe, added)
+        return bool(removed_ids or changed or added)
+
+    @transaction.atomic
     def create(self, validated_data):
         author = self.context['request'].user
         validated_data['author'] = author
-        ingredients_data = self.context['request'].data.get('ingredients', [])
+        ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags', [])
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
-        self.process_ingredients(recipe, ingredients_data)
+        self.process_ingredients(recipe, ingredients)
         return recipe
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
         recipe.name = validated_data.get('name', recipe.name)
         recipe.text = validated_data.get('text', recipe.text)
@@ -159,17 +197,14 @@ class RecipeCreateUpdateSerializer(RecipeSerializer):
             'cooking_time',
             recipe.cooking_time
         )
-        ingredients_data = self.context['request'].data.get('ingredients', [])
-        IngredientsInRecipe.objects.filter(recipe=recipe).delete()
-        self.process_ingredients(recipe, ingredients_data)
-        tags_data = validated_data.get('tags', [])
-        recipe.tags.clear()
-        tag_serializer = serializers.SlugRelatedField(
-            many=True, slug_field='name', queryset=Tag.objects.all()
-        )
-        tags = tag_serializer.to_internal_value(tags_data)
-        recipe.tags.set(tags)
-        recipe.save()
+        ingredients = validated_data.pop('ingredients')
+        if self.update_ingredients(recipe, ingredients):
+            invalidate_recipe_shopping_lists(recipe.id)
+        recipe.tags.set(validated_data.get('tags', []))
+        # Счётчики и миниатюры меняются отдельными UPDATE, поэтому
+        # сохраняем только поля из запроса, чтобы не затереть их
+        # значениями, прочитанными в начале запроса.
+        recipe.save(update_fields=self.UPDATE_FIELDS)
         return recipe
 
     def validate(self, data):
@@ -189,6 +224,16 @@ class RecipeCreateUpdateSerializer(RecipeSerializer):
         ingredient_ids = [
             ingredient_data.get('id') for ingredient_data in ingredients_data
         ]
+
+        try:
+            ingredient_ids = [
+                int(ingredient_id) for ingredient_id in ingredient_ids
+            ]
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({
+                'ingredients': ' Проверьте идентификаторы ингредиентов.'
+            })
+
         if len(ingredient_ids) != len(set(ingredient_ids)):
             raise serializers.ValidationError({
                 'ingredients':
@@ -196,29 +241,43 @@ class RecipeCreateUpdateSerializer(RecipeSerializer):
                 ' Удалите дублирующиеся ингредиенты и попробуйте снова.'
             })
 
+        ingredients = Ingredient.objects.in_bulk(ingredient_ids)
+        missing_ids = set(ingredient_ids) - ingredients.keys()
+        if missing_ids:
+            raise serializers.ValidationError({
+                'ingredients':
+                ' Ингредиенты с id {} не существуют.'.format(
+                    ', '.join(map(str, sorted(missing_ids)))
+                )
+            })
+        data['ingredients'] = [
+            (ingredients[ingredient_id], ingredient_data.get('amount'))
+            for ingredient_id, ingredient_data in zip(
+                ingredient_ids, ingredients_data
+            )
+        ]
+
         return data
 
     def to_representation(self, instance):
-        ret = super().to_representation(instance)
-        tags = instance.tags.all()
-        tag_serializer = TagSerializer(tags, many=True)
-        ret['tags'] = tag_serializer.data
-        ingredients = instance.ingredients.annotate(
-            amount=F('ingredients_in_recipe__amount')
-        ).values(
-            'id',
-            'name',
-            'measurement_unit',
-            'amount',
+        prefetch_related_objects(
+            [instance],
+            'tags',
+            Prefetch(
+                'ingredients_in_recipe',
+                queryset=IngredientsInRecipe.objects.select_related(
+                    'ingredient'
+                )
+            )
         )
-        ret['ingredients'] = ingredients
-        return ret
+        return RecipeSerializer(instance, context=self.context).data
 
 
 class FavoritesSLRecipeSerializer(serializers.ModelSerializer):
     """
     Наш сериализатор для отображения рецепта в избранном и списке покупок.
     """
+    thumbnails = ThumbnailsField()
 
     class Meta:
         model = Recipe
@@ -226,5 +285,6 @@ class FavoritesSLRecipeSerializer(serializers.ModelSerializer):
             'id',
             'name',
             'image',
+            'thumbnails',
             'cooking_time'
         )
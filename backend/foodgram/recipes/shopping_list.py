@@ -0,0 +1,163 @@
+import os
+from tempfile import TemporaryFile
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http import FileResponse, HttpResponse
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from .constants import (DELTA_Y_COORD_PAGE, END_Y_COORD_PAGE, FONT_FILE_NAME,
+                        FONT_NAME, FONT_SIZE, LIST_Y_COORD_PAGE,
+                        SHOPPING_LIST_CACHE_MAX_SIZE,
+                        SHOPPING_LIST_CACHE_TIMEOUT, START_X_COORD_PAGE,
+                        START_Y_COORD_PAGE)
+from .exceptions import MissingFontError
+from .models import ShoppingList
+
+SHOPPING_LIST_TITLE = 'Список покупок'
+SHOPPING_LIST_VERSION_KEY = 'shopping_list_version:{user_id}'
+SHOPPING_LIST_CACHE_KEY = 'shopping_list:{user_id}:{version}'
+FONT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'fonts', FONT_FILE_NAME
+)
+
+
+def register_font():
+    """
+    Регистрирует шрифт для pdf. Вызывается один раз на процесс
+    при старте приложения.
+    """
+    if not os.path.exists(FONT_PATH):
+        raise MissingFontError(FONT_PATH)
+    pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def font_is_registered():
+    return FONT_NAME in pdfmetrics.getRegisteredFontNames()
+
+
+def format_line(ingredient):
+    return '{}: {} {}'.format(
+        ingredient['ingredient__name'],
+        ingredient['total_amount'],
+        ingredient['ingredient__measurement_unit']
+    )
+
+
+def write_pdf(ingredients, document):
+    """Отрисовывает список покупок в pdf, перенося строки на новые страницы."""
+    p = canvas.Canvas(document, pagesize=letter)
+    p.setFont(FONT_NAME, FONT_SIZE)
+    p.drawString(START_X_COORD_PAGE, START_Y_COORD_PAGE, SHOPPING_LIST_TITLE)
+    y = LIST_Y_COORD_PAGE
+    for ingredient in ingredients:
+        if y < END_Y_COORD_PAGE:
+            p.showPage()
+            p.setFont(FONT_NAME, FONT_SIZE)
+            y = START_Y_COORD_PAGE
+        p.drawString(START_X_COORD_PAGE, y, format_line(ingredient))
+        y -= DELTA_Y_COORD_PAGE
+    p.showPage()
+    p.save()
+
+
+def iter_txt_lines(ingredients):
+    yield '{}\n\n'.format(SHOPPING_LIST_TITLE)
+    yield '{}\n'.format('=' * 20)
+    for ingredient in ingredients:
+        yield '{}\n'.format(format_line(ingredient))
+
+
+def write_txt(ingredients, document):
+    for line in iter_txt_lines(ingredients):
+        document.write(line.encode())
+
+
+def get_version_key(user_id):
+    return SHOPPING_LIST_VERSION_KEY.format(user_id=user_id)
+
+
+def get_cache_key(user_id):
+    """
+    Ключ закэшированного документа включает версию списка покупок
+    пользователя. Если версия вытеснена из кэша, создается новая,
+    поэтому устаревший документ не может быть отдан.
+    """
+    version_key = get_version_key(user_id)
+    version = cache.get(version_key)
+    if version is None:
+        version = uuid4().hex
+        cache.set(version_key, version, None)
+    return SHOPPING_LIST_CACHE_KEY.format(user_id=user_id, version=version)
+
+
+def invalidate_shopping_lists(user_ids):
+    """
+    Сбрасывает закэшированные списки покупок пользователей после
+    фиксации транзакции: иначе параллельный запрос успеет закэшировать
+    под новой версией ещё не изменённые данные.
+    """
+    versions = {get_version_key(user_id): None for user_id in user_ids}
+    transaction.on_commit(lambda: cache.set_many(
+        {version_key: uuid4().hex for version_key in versions}, None
+    ))
+
+
+def invalidate_recipe_shopping_lists(recipe_id):
+    """Сбрасывает списки покупок всех, у кого рецепт в корзине."""
+    invalidate_shopping_lists(
+        ShoppingList.objects
+        .filter(recipe_id=recipe_id)
+        .values_list('user_id', flat=True)
+    )
+
+
+def document_response(content, content_type, filename):
+    response = HttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = (
+        'attachment; filename="{}"'.format(filename)
+    )
+    return response
+
+
+def get_cached_response(cache_key):
+    """Возвращает закэшированный список покупок или None."""
+    document = cache.get(cache_key)
+    if document is None:
+        return None
+    return document_response(*document)
+
+
+def shopping_list_response(cache_key, ingredients):
+    """
+    Формирует ответ со списком покупок: pdf, если доступен шрифт,
+    иначе *.txt. Документ пишется во временный файл; небольшие
+    документы кэшируются, большие отдаются клиенту по частям.
+    cache_key должен быть получен до выборки ингредиентов: изменение
+    корзины, зафиксированное после него, сменит версию, и устаревший
+    документ под новым ключом не окажется.
+    """
+    document = TemporaryFile()
+    if font_is_registered():
+        write_pdf(ingredients, document)
+        content_type, filename = 'application/pdf', 'shopping_list.pdf'
+    else:
+        write_txt(ingredients, document)
+        content_type, filename = 'text/plain', 'shopping_list.txt'
+    if document.tell() > SHOPPING_LIST_CACHE_MAX_SIZE:
+        document.seek(0)
+        return FileResponse(
+            document,
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type
+        )
+    document.seek(0)
+    with document:
+        cached_document = (document.read(), content_type, filename)
+    cache.set(cache_key, cached_document, SHOPPING_LIST_CACHE_TIMEOUT)
+    return document_response(*cached_document)
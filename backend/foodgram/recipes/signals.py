@@ -0,0 +1,118 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from foodgram.conditional import bump_versions
+from ingredients.models import Ingredient
+from tags.models import Tag
+from users.models import Subscribe, User
+
+from .constants import (AUTHOR_FIELDS, POPULARITY_VERSION_KEY,
+                        RECIPES_VERSION_KEY, USER_STATE_VERSION_KEY)
+from .counters import COUNTERS, shift_counter
+from .models import Favorites, IngredientsInRecipe, Recipe, ShoppingList
+from .shopping_list import (invalidate_recipe_shopping_lists,
+                            invalidate_shopping_lists)
+from .thumbnails import schedule_thumbnails
+
+
+def touch_recipes(**filters):
+    Recipe.objects.filter(**filters).update(updated_at=timezone.now())
+    bump_versions(RECIPES_VERSION_KEY)
+
+
+@receiver([post_save, post_delete], sender=ShoppingList)
+def shopping_list_changed(sender, instance, **kwargs):
+    invalidate_shopping_lists([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=IngredientsInRecipe)
+def ingredients_in_recipe_changed(sender, instance, **kwargs):
+    invalidate_recipe_shopping_lists(instance.recipe_id)
+    touch_recipes(pk=instance.recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, Recipe):
+        touch_recipes(pk=instance.pk)
+    elif pk_set:
+        touch_recipes(pk__in=pk_set)
+    else:
+        bump_versions(RECIPES_VERSION_KEY)
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    bump_versions(RECIPES_VERSION_KEY)
+
+
+@receiver(pre_save, sender=User)
+def author_saving(sender, instance, update_fields, **kwargs):
+    """
+    Запоминает, меняются ли поля автора, которые выводятся в рецептах.
+    Сравнивает с базой до сохранения, пока там лежат старые значения.
+    """
+    fields = AUTHOR_FIELDS
+    if update_fields is not None:
+        fields = fields & update_fields
+    instance._author_changed = bool(instance.pk and fields) and (
+        User.objects.filter(pk=instance.pk).exclude(
+            **{field: getattr(instance, field) for field in fields}
+        ).exists()
+    )
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, **kwargs):
+    if getattr(instance, '_author_changed', False):
+        touch_recipes(author=instance)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def recipe_tag_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        touch_recipes(tags=instance)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def recipe_ingredient_changed(sender, instance, created=False, **kwargs):
+    if not created:
+        touch_recipes(ingredients=instance)
+
+
+@receiver([post_save, post_delete], sender=Favorites)
+@receiver([post_save, post_delete], sender=ShoppingList)
+@receiver([post_save, post_delete], sender=Subscribe)
+def user_state_changed(sender, instance, **kwargs):
+    bump_versions(USER_STATE_VERSION_KEY.format(user_id=instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=Favorites)
+def favorites_count_changed(sender, instance, **kwargs):
+    bump_versions(POPULARITY_VERSION_KEY)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, **kwargs):
+    schedule_thumbnails(instance)
+
+
+@receiver([post_save, post_delete], sender=Favorites)
+@receiver([post_save, post_delete], sender=ShoppingList)
+@receiver([post_save, post_delete], sender=Subscribe)
+@receiver([post_save, post_delete], sender=Recipe)
+def counted_object_changed(sender, instance, signal, created=False,
+                           **kwargs):
+    if signal is post_save and not created:
+        return
+    delta = 1 if created else -1
+    for model, field, related_model, related_field in COUNTERS:
+        if related_model is sender:
+            pk = getattr(instance, f'{related_field}_id')
+            shift_counter(model, pk, field, delta)
@@ -0,0 +1,483 @@
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ingredients.models import Ingredient
+from tags.models import Tag
+from users.models import Subscribe, User
+
+from .constants import PAGINATION_SIZE
+from .models import Favorites, IngredientsInRecipe, Recipe, ShoppingList
+from .serializers import RecipeCreateUpdateSerializer
+from .shopping_list import get_cached_response, invalidate_shopping_lists
+from .storage import ContentAddressedStorage
+from .thumbnails import save_thumbnail
+
+RECIPES_URL = '/api/recipes/'
+SHOPPING_LIST_URL = '/api/recipes/download_shopping_cart/'
+
+
+class RecipeTestMixin:
+    """Общие данные для тестов рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            username='author', email='author@example.com',
+            first_name='Автор', last_name='Рецептов'
+        )
+        cls.user = User.objects.create(
+            username='user', email='user@example.com',
+            first_name='Читатель', last_name='Рецептов'
+        )
+        cls.tags = [
+            Tag.objects.create(name=f'Тег {i}', color=f'#00000{i}',
+                               slug=f'tag-{i}')
+            for i in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(name=f'Ингредиент {i}',
+                                      measurement_unit='г')
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def create_recipe(self, name, ingredients):
+        recipe = Recipe.objects.create(
+            author=self.author, name=name, text='Описание', cooking_time=10
+        )
+        recipe.tags.set(self.tags)
+        IngredientsInRecipe.objects.bulk_create(
+            IngredientsInRecipe(recipe=recipe, ingredient=ingredient,
+                                amount=amount)
+            for ingredient, amount in ingredients
+        )
+        return recipe
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client
+
+
+class RecipeListQueriesTest(RecipeTestMixin, TestCase):
+    """Количество запросов списка рецептов не зависит от их числа."""
+
+    # COUNT, рецепты с авторами, теги, ингредиенты.
+    ANONYMOUS_QUERIES = 4
+    # Те же запросы с флагами пользователя в аннотациях.
+    AUTHENTICATED_QUERIES = 4
+    # Общий ответ и избранное, корзина и подписки пользователя.
+    OVERLAY_QUERIES = 7
+
+    def fill_recipes(self, amount):
+        for i in range(amount):
+            recipe = self.create_recipe(f'Рецепт {i}', [
+                (ingredient, 10 + i) for ingredient in self.ingredients
+            ])
+            Favorites.objects.create(user=self.user, recipe=recipe)
+            ShoppingList.objects.create(user=self.user, recipe=recipe)
+        Subscribe.objects.get_or_create(user=self.user, author=self.author)
+
+    def assert_list_queries(self, client, num_queries, amount):
+        cache.clear()
+        with self.assertNumQueries(num_queries):
+            response = client.get(RECIPES_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), amount)
+        return response
+
+    def check_queries(self, client, num_queries):
+        self.fill_recipes(1)
+        self.assert_list_queries(client, num_queries, 1)
+        self.fill_recipes(PAGINATION_SIZE)
+        return self.assert_list_queries(
+            client, num_queries, PAGINATION_SIZE
+        )
+
+    def test_anonymous_list(self):
+        self.check_queries(self.client_for(), self.ANONYMOUS_QUERIES)
+
+    @override_settings(RECIPES_PERSONAL_OVERLAY=False)
+    def test_authenticated_list(self):
+        response = self.check_queries(
+            self.client_for(self.user), self.AUTHENTICATED_QUERIES
+        )
+        recipe = response.data['results'][0]
+        self.assertTrue(recipe['is_favorited'])
+        self.assertTrue(recipe['is_in_shopping_cart'])
+        self.assertTrue(recipe['author']['is_subscribed'])
+
+    def test_authenticated_list_with_overlay(self):
+        response = self.check_queries(
+            self.client_for(self.user), self.OVERLAY_QUERIES
+        )
+        recipe = response.data['results'][0]
+        self.assertTrue(recipe['is_favorited'])
+        self.assertTrue(recipe['is_in_shopping_cart'])
+        self.assertTrue(recipe['author']['is_subscribed'])
+
+
+@mock.patch('recipes.shopping_list.font_is_registered', return_value=False)
+class ShoppingListTest(RecipeTestMixin, TestCase):
+    """Список покупок собирается одним агрегирующим запросом."""
+
+    def test_ingredients_are_summed(self, font_is_registered):
+        salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        milk = Ingredient.objects.create(name='Молоко', measurement_unit='мл')
+        eggs = Ingredient.objects.create(name='Яйца', measurement_unit='шт')
+        recipes = [
+            self.create_recipe('Омлет', [(milk, 100), (eggs, 3), (salt, 2)]),
+            self.create_recipe('Блины', [(milk, 500), (eggs, 2), (salt, 5)]),
+            self.create_recipe('Яичница', [(eggs, 4), (salt, 1)]),
+        ]
+        for recipe in recipes:
+            ShoppingList.objects.create(user=self.user, recipe=recipe)
+        self.create_recipe('Не в корзине', [(salt, 1000)])
+        client = self.client_for(self.user)
+
+        with self.assertNumQueries(1):
+            response = client.get(SHOPPING_LIST_URL)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        lines = response.content.decode().splitlines()[3:]
+        self.assertEqual(lines, [
+            'Молоко: 600 мл',
+            'Соль: 8 г',
+            'Яйца: 9 шт',
+        ])
+
+    def test_cached_list_is_reset_after_commit(self, font_is_registered):
+        milk = Ingredient.objects.create(name='Молоко', measurement_unit='мл')
+        recipe = self.create_recipe('Каша', [(milk, 200)])
+        ShoppingList.objects.create(user=self.user, recipe=recipe)
+        client = self.client_for(self.user)
+        client.get(SHOPPING_LIST_URL)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            IngredientsInRecipe.objects.filter(recipe=recipe).update(
+                amount=300
+            )
+            IngredientsInRecipe.objects.get(recipe=recipe).save()
+            with self.assertNumQueries(0):
+                response = client.get(SHOPPING_LIST_URL)
+            self.assertIn('Молоко: 200 мл', response.content.decode())
+        for callback in callbacks:
+            callback()
+
+        response = client.get(SHOPPING_LIST_URL)
+        self.assertIn('Молоко: 300 мл', response.content.decode())
+
+    def test_list_built_before_commit_is_not_cached_as_new(
+        self, font_is_registered
+    ):
+        milk = Ingredient.objects.create(name='Молоко', measurement_unit='мл')
+        recipe = self.create_recipe('Каша', [(milk, 200)])
+        ShoppingList.objects.create(user=self.user, recipe=recipe)
+        client = self.client_for(self.user)
+
+        def commit_during_request(cache_key):
+            with self.captureOnCommitCallbacks(execute=True):
+                invalidate_shopping_lists([self.user.id])
+            return get_cached_response(cache_key)
+
+        with mock.patch('recipes.views.get_cached_response',
+                        side_effect=commit_during_request):
+            client.get(SHOPPING_LIST_URL)
+
+        with self.assertNumQueries(1):
+            client.get(SHOPPING_LIST_URL)
+
+
+class RecipeWriteTest(RecipeTestMixin, TestCase):
+    """Создание и изменение рецептов."""
+
+    def recipe_data(self, ingredients):
+        return {
+            'name': 'Рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'tags': [self.tags[0].id],
+            'ingredients': ingredients,
+        }
+
+    def test_duplicate_ingredient_ids_are_rejected(self):
+        ingredient_id = self.ingredients[0].id
+        response = self.client_for(self.author).post(
+            RECIPES_URL,
+            self.recipe_data([
+                {'id': str(ingredient_id), 'amount': 10},
+                {'id': ingredient_id, 'amount': 20},
+            ]),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ingredients', response.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def update_recipe(self, recipe, ingredients):
+        return self.client_for(self.author).patch(
+            f'{RECIPES_URL}{recipe.id}/',
+            self.recipe_data([
+                {'id': ingredient.id, 'amount': amount}
+                for ingredient, amount in ingredients
+            ]),
+            format='json'
+        )
+
+    def rows_of(self, recipe):
+        return dict(
+            IngredientsInRecipe.objects.filter(recipe=recipe)
+            .values_list('ingredient_id', 'id')
+        )
+
+    def test_update_keeps_unchanged_rows(self):
+        first, second, third, fourth = self.ingredients[:4]
+        recipe = self.create_recipe(
+            'Рецепт', [(first, 10), (second, 20), (third, 30)]
+        )
+        rows_before = self.rows_of(recipe)
+
+        response = self.update_recipe(
+            recipe, [(first, 10), (second, 25), (fourth, 40)]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        rows_after = self.rows_of(recipe)
+        self.assertEqual(rows_after[first.id], rows_before[first.id])
+        self.assertEqual(rows_after[second.id], rows_before[second.id])
+        self.assertNotIn(third.id, rows_after)
+        self.assertIn(fourth.id, rows_after)
+        self.assertEqual(
+            dict(IngredientsInRecipe.objects.filter(recipe=recipe)
+                 .values_list('ingredient_id', 'amount')),
+            {first.id: 10, second.id: 25, fourth.id: 40}
+        )
+
+    def test_unchanged_update_writes_no_ingredient_rows(self):
+        ingredients = [(self.ingredients[0], 10), (self.ingredients[1], 20)]
+        recipe = self.create_recipe('Рецепт', ingredients)
+        rows_before = self.rows_of(recipe)
+
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = self.update_recipe(recipe, ingredients)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.rows_of(recipe), rows_before)
+        self.assertTrue(any(
+            sql.startswith('UPDATE "recipes_recipe"') for sql in queries
+        ))
+        self.assertEqual([
+            sql for sql in queries
+            if 'recipes_ingredientsinrecipe' in sql
+            and sql.split()[0] in ('INSERT', 'UPDATE', 'DELETE')
+        ], [])
+
+    def test_stale_update_keeps_counters(self):
+        recipe = self.create_recipe('Рецепт', [(self.ingredients[0], 10)])
+        stale = Recipe.objects.get(pk=recipe.pk)
+        Favorites.objects.create(user=self.user, recipe=recipe)
+        ShoppingList.objects.create(user=self.user, recipe=recipe)
+        data = self.recipe_data([
+            {'id': self.ingredients[0].id, 'amount': 10}
+        ])
+        serializer = RecipeCreateUpdateSerializer(
+            stale, data=data, partial=True,
+            context={'request': mock.Mock(data=data, user=self.author)}
+        )
+        serializer.is_valid(raise_exception=True)
+
+        serializer.save()
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(recipe.carts_count, 1)
+
+    def test_subscribe_keeps_author_row(self):
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = self.client_for(self.user).post(
+                f'/api/users/{self.author.id}/subscribe/'
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.subscribers_count, 1)
+        self.assertEqual([
+            sql for sql in queries
+            if sql.startswith(('UPDATE "users_user"', 'UPDATE "recipes_'))
+            and 'subscribers_count' not in sql
+        ], [])
+
+
+class PopularOrderingTest(RecipeTestMixin, TestCase):
+    """Сортировка по популярности не отдаёт устаревший кэш."""
+
+    def test_new_favorite_changes_popular_feed(self):
+        recipes = [
+            self.create_recipe(f'Рецепт {i}', [(self.ingredients[0], 10)])
+            for i in range(3)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorites.objects.create(user=self.author, recipe=recipes[1])
+        client = self.client_for()
+        url = f'{RECIPES_URL}?ordering=popular'
+        response = client.get(url)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [recipes[1].id, recipes[2].id, recipes[0].id]
+        )
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorites.objects.create(user=self.author, recipe=recipes[0])
+            Favorites.objects.create(user=self.user, recipe=recipes[0])
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [recipes[0].id, recipes[1].id, recipes[2].id]
+        )
+
+    def test_score_refresh_changes_only_trending_feed(self):
+        recipe = self.create_recipe('Рецепт', [(self.ingredients[0], 10)])
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorites.objects.create(user=self.user, recipe=recipe)
+        client = self.client_for()
+        urls = [
+            f'{RECIPES_URL}?ordering=trending',
+            RECIPES_URL,
+            f'{RECIPES_URL}{recipe.id}/',
+        ]
+        etags = [client.get(url)['ETag'] for url in urls]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                'refresh_recipe_scores', stdout=StringIO(), stderr=StringIO()
+            )
+
+        self.assertEqual([
+            client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+            for url, etag in zip(urls, etags)
+        ], [200, 304, 304])
+
+
+class RecipeInvalidationTest(RecipeTestMixin, TestCase):
+    """Изменения тегов, ингредиентов и авторов сбрасывают кэш рецептов."""
+
+    def assert_detail_refreshed(self, change, check):
+        recipe = self.create_recipe('Рецепт', [(self.ingredients[0], 10)])
+        client = self.client_for()
+        url = f'{RECIPES_URL}{recipe.id}/'
+        etag = client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        check(response.data)
+
+    def test_tag_rename(self):
+        tag = self.tags[0]
+
+        def rename():
+            tag.name = 'Новый тег'
+            tag.save()
+
+        self.assert_detail_refreshed(rename, lambda data: self.assertIn(
+            'Новый тег', [tag['name'] for tag in data['tags']]
+        ))
+
+    def test_ingredient_rename(self):
+        ingredient = self.ingredients[0]
+
+        def rename():
+            ingredient.measurement_unit = 'кг'
+            ingredient.save()
+
+        self.assert_detail_refreshed(rename, lambda data: self.assertEqual(
+            data['ingredients'][0]['measurement_unit'], 'кг'
+        ))
+
+    def test_author_rename(self):
+        def rename():
+            self.author.first_name = 'Повар'
+            self.author.save()
+
+        self.assert_detail_refreshed(rename, lambda data: self.assertEqual(
+            data['author']['first_name'], 'Повар'
+        ))
+
+    def test_unchanged_author_save_keeps_recipes(self):
+        recipe = self.create_recipe('Рецепт', [(self.ingredients[0], 10)])
+        recipe.refresh_from_db()
+        updated_at = recipe.updated_at
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+            self.author.set_password('password')
+            self.author.save(update_fields=['password'])
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.updated_at, updated_at)
+
+
+class ContentAddressedStorageTest(TestCase):
+    """Хранилище изображений по хэшу содержимого."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = ContentAddressedStorage(location=directory.name)
+
+    def test_same_content_is_stored_once_and_touched(self):
+        name = self.storage.save('images/a.png', ContentFile(b'image'))
+        path = self.storage.path(name)
+        two_hours_ago = time.time() - 2 * 60 * 60
+        os.utime(path, (two_hours_ago, two_hours_ago))
+
+        same_name = self.storage.save('images/b.png', ContentFile(b'image'))
+
+        self.assertEqual(same_name, name)
+        self.assertEqual(self.storage.listdir('images'), ([], [
+            os.path.basename(name)
+        ]))
+        self.assertGreater(os.path.getmtime(path), time.time() - 60)
+
+    def test_thumbnail_reuse_is_touched(self):
+        with mock.patch.object(Recipe.image.field, 'storage', self.storage):
+            name = save_thumbnail(b'thumbnail', 320, 'webp')
+            path = self.storage.path(name)
+            two_hours_ago = time.time() - 2 * 60 * 60
+            os.utime(path, (two_hours_ago, two_hours_ago))
+
+            same_name = save_thumbnail(b'thumbnail', 320, 'webp')
+
+        self.assertEqual(same_name, name)
+        self.assertGreater(os.path.getmtime(path), time.time() - 60)
@@ -0,0 +1,119 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, features
+
+from foodgram.conditional import bump_versions
+
+from .constants import (RECIPES_VERSION_KEY, THUMBNAIL_QUALITY,
+                        THUMBNAIL_UPLOAD_TO, THUMBNAIL_WIDTHS)
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.THUMBNAIL_WORKERS,
+    thread_name_prefix='thumbnails'
+)
+
+
+def get_thumbnail_format():
+    if features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def encode_thumbnail(image, width):
+    """Уменьшает изображение до заданной ширины и кодирует его."""
+    image_format, extension = get_thumbnail_format()
+    if image.width > width:
+        height = round(image.height * width / image.width)
+        image = image.resize((width, height), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=THUMBNAIL_QUALITY)
+    return buffer.getvalue(), extension
+
+
+def save_thumbnail(content, width, extension):
+    """
+    Сохраняет миниатюру в хранилище изображений рецептов. Имя файла -
+    хэш содержимого, поэтому одинаковые миниатюры хранятся один раз,
+    а повторное сохранение обновляет время изменения файла для gc_media.
+    """
+    return Recipe.image.field.storage.save(
+        '{}/{}.{}'.format(THUMBNAIL_UPLOAD_TO, width, extension),
+        ContentFile(content)
+    )
+
+
+def make_thumbnails(image_field):
+    with image_field.open('rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        keep_alpha = (
+            'A' in image.getbands() and get_thumbnail_format()[0] == 'WEBP'
+        )
+        image = image.convert('RGBA' if keep_alpha else 'RGB')
+        thumbnails = {}
+        for width in THUMBNAIL_WIDTHS:
+            content, extension = encode_thumbnail(image, width)
+            thumbnails[str(width)] = save_thumbnail(content, width, extension)
+    return thumbnails
+
+
+def render_thumbnails(recipe_id):
+    """
+    Строит миниатюры изображения рецепта. Сохраняет их, только если
+    изображение не поменялось, пока шла обработка.
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return
+    thumbnails = make_thumbnails(recipe.image)
+    thumbnails['source'] = recipe.image.name
+    updated = Recipe.objects.filter(
+        pk=recipe_id, image=recipe.image.name
+    ).update(thumbnails=thumbnails, updated_at=timezone.now())
+    if updated:
+        bump_versions(RECIPES_VERSION_KEY)
+
+
+def render_thumbnails_task(recipe_id):
+    try:
+        render_thumbnails(recipe_id)
+    except Exception:
+        logger.exception(
+            'Не удалось построить миниатюры рецепта %s.', recipe_id
+        )
+    finally:
+        connection.close()
+
+
+def schedule_thumbnails(recipe):
+    """
+    Ставит построение миниатюр в очередь пула после фиксации
+    транзакции, чтобы не задерживать ответ на запрос.
+    """
+    if not recipe.image:
+        return
+    if recipe.thumbnails.get('source') == recipe.image.name:
+        return
+    transaction.on_commit(
+        lambda: executor.submit(render_thumbnails_task, recipe.pk)
+    )
+
+
+def get_thumbnail_urls(thumbnails, request=None):
+    urls = {}
+    for width in THUMBNAIL_WIDTHS:
+        name = thumbnails.get(str(width))
+        if name is None:
+            continue
+        url = Recipe.image.field.storage.url(name)
+        urls[width] = request.build_absolute_uri(url) if request else url
+    return urls
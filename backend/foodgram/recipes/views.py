@@ -1,38 +1,42 @@
-import os
-from collections import defaultdict
-from io import BytesIO
-
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Prefetch, Sum, Value
 from django.http import HttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
-from .constants import (DELTA_Y_COORD_PAGE, FONT_SIZE, LIST_Y_COORD_PAGE,
-                        PAGINATION_SIZE, START_X_COORD_PAGE,
-                        START_Y_COORD_PAGE)
-from .exceptions import MissingFontError
+from foodgram.conditional import (ConditionalResponseMixin,
+                                  SharedResponseCacheMixin, get_version,
+                                  version_to_datetime)
+from users.models import Subscribe
+
+from .constants import (ORDERING_VERSION_KEYS, PERSONAL_FILTERS,
+                        RECIPES_ANONYMOUS_MAX_AGE,
+                        RECIPES_RESPONSE_CACHE_TIMEOUT, RECIPES_VERSION_KEY,
+                        USER_STATE_VERSION_KEY)
 from .filters import RecipeFilter
 from .models import Favorites, IngredientsInRecipe, Recipe, ShoppingList
+from .pagination import RecipePagination
 from .permissions import IsRecipeAuthorOrReadOnly
+from .personal import apply_personal_state, get_personal_state
 from .serializers import (FavoritesSLRecipeSerializer,
                           RecipeCreateUpdateSerializer, RecipeSerializer)
+from .shopping_list import (get_cache_key, get_cached_response,
+                            shopping_list_response)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalResponseMixin, SharedResponseCacheMixin,
+                    viewsets.ModelViewSet):
     """Наш ViewSet для работы с рецептами."""
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = [permissions.AllowAny]
-    pagination_class = PageNumberPagination
-    pagination_class.page_size = PAGINATION_SIZE
+    pagination_class = RecipePagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    response_cache_version_key = RECIPES_VERSION_KEY
+    response_cache_timeout = RECIPES_RESPONSE_CACHE_TIMEOUT
 
     def get_serializer_class(self):
         if self.action in ['create', 'partial_update']:
@@ -52,8 +56,113 @@ class RecipeViewSet(viewsets.ModelViewSet):
             self.permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in self.permission_classes]
 
+    def uses_shared_response(self, request):
+        if request.user.is_anonymous:
+            return True
+        return settings.RECIPES_PERSONAL_OVERLAY and not any(
+            name in request.query_params for name in PERSONAL_FILTERS
+        )
+
+    def personalize(self, request, data):
+        return apply_personal_state(data, get_personal_state(request.user))
+
+    def get_user_state_version(self, request):
+        if request.user.is_anonymous:
+            return None
+        return get_version(
+            USER_STATE_VERSION_KEY.format(user_id=request.user.id)
+        )
+
+    def get_updated_at(self, pk):
+        if not hasattr(self, '_updated_at'):
+            self._updated_at = (
+                Recipe.objects.filter(pk=pk)
+                .values_list('updated_at', flat=True)
+                .first()
+            )
+        return self._updated_at
+
+    def get_response_cache_versions(self, request):
+        """
+        Версии данных общего ответа. Сортировки по популярности зависят
+        ещё и от счётчиков избранного или рейтинга за неделю, которые
+        меняются без версии рецептов.
+        """
+        versions = (get_version(RECIPES_VERSION_KEY),)
+        ordering_version_key = ORDERING_VERSION_KEYS.get(
+            request.query_params.get('ordering')
+        )
+        if ordering_version_key:
+            versions += (get_version(ordering_version_key),)
+        return versions
+
+    def get_etag_parts(self, request, *args, **kwargs):
+        user_state = self.get_user_state_version(request)
+        if self.action == 'list' or request.user.is_anonymous:
+            return (
+                *self.get_response_cache_versions(request),
+                kwargs.get('pk'),
+                user_state
+            )
+        updated_at = self.get_updated_at(kwargs.get('pk'))
+        if updated_at is None:
+            return None
+        return (kwargs.get('pk'), updated_at.timestamp(), user_state)
+
+    def get_last_modified(self, request, *args, **kwargs):
+        if self.action == 'list' or request.user.is_anonymous:
+            last_modified = version_to_datetime(
+                max(self.get_response_cache_versions(request))
+            )
+        else:
+            last_modified = self.get_updated_at(kwargs.get('pk'))
+            if last_modified is None:
+                return None
+        user_state = self.get_user_state_version(request)
+        if user_state is not None:
+            last_modified = max(
+                last_modified, version_to_datetime(user_state)
+            )
+        return last_modified
+
+    def get_cache_control(self, request):
+        if request.user.is_anonymous:
+            return {'public': True, 'max_age': RECIPES_ANONYMOUS_MAX_AGE}
+        return {'private': True, 'no_cache': True}
+
     def get_queryset(self):
-        return super().get_queryset()
+        queryset = super().get_queryset()
+        if self.action not in ['list', 'retrieve']:
+            return queryset
+        queryset = queryset.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredients_in_recipe',
+                queryset=IngredientsInRecipe.objects.select_related(
+                    'ingredient'
+                )
+            )
+        )
+        user = self.request.user
+        if user.is_anonymous:
+            return queryset
+        if self.shared_response:
+            return queryset.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+                is_author_subscribed=Value(False)
+            )
+        return queryset.annotate(
+            is_favorited=Exists(Favorites.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingList.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_author_subscribed=Exists(Subscribe.objects.filter(
+                user=user, author=OuterRef('author')
+            ))
+        )
 
     @action(
         methods=['post'],
@@ -134,69 +243,17 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
     def download_shopping_list(self, request):
         user = self.get_serializer_context()['request'].user
-        shopping_list = ShoppingList.objects.filter(user=user)
-        if not shopping_list.exists():
-            return HttpResponse('Список покупок пуст.')
-        ingredients = (IngredientsInRecipe.objects
-                       .filter(recipe__shopping_list__in=shopping_list)
-                       .values('ingredient__name',
-                               'amount',
-                               'ingredient__measurement_unit'))
-        ingredient_totals = defaultdict(float)
-
-        for ingredient in ingredients:
-            ingredient_name = ingredient['ingredient__name']
-            ingredient_quantity = ingredient['amount']
-            ingredient_unit = ingredient['ingredient__measurement_unit']
-            ingredient_totals[ingredient_name] += ingredient_quantity
-
-        pdf_buffer = BytesIO()
-
-        p = canvas.Canvas(pdf_buffer, pagesize=letter)
-
-        try:
-            if os.path.exists('./fonts/ArialRegular.ttf'):
-                pdfmetrics.registerFont(TTFont(
-                    'Arial',
-                    './fonts/ArialRegular.ttf')
-                )
-                p.setFont('Arial', FONT_SIZE)
-            else:
-                raise MissingFontError
-        except MissingFontError:
-            error = MissingFontError()
-            return error.generate_txt_shopping_list(ingredient_totals)
-
-        p.drawString(START_X_COORD_PAGE, START_Y_COORD_PAGE, 'Список покупок')
-
-        y = LIST_Y_COORD_PAGE
-
-        for ingredient_name, ingredient_quantity in (
-            ingredient_totals.items()
-        ):
-            ingredient_unit = (
-                IngredientsInRecipe.objects
-                .filter(ingredient__name=ingredient_name)
-                .first()
-                .ingredient.measurement_unit
-            )
-            p.drawString(
-                START_X_COORD_PAGE,
-                y,
-                "{}: {} {}".format(ingredient_name,
-                                   ingredient_quantity,
-                                   ingredient_unit)
-            )
-            y -= DELTA_Y_COORD_PAGE
-
-        p.showPage()
-        p.save()
-
-        pdf_buffer.seek(0)
-
-        response = HttpResponse(pdf_buffer, content_type='application/pdf')
-        response['Content-Disposition'] = (
-            'attachment; filename="shopping_list.pdf"'
+        cache_key = get_cache_key(user.id)
+        cached_response = get_cached_response(cache_key)
+        if cached_response:
+            return cached_response
+        ingredients = list(
+            IngredientsInRecipe.objects
+            .filter(recipe__shopping_list__user=user)
+            .values('ingredient__name', 'ingredient__measurement_unit')
+            .annotate(total_amount=Sum('amount'))
+            .order_by('ingredient__name')
         )
-
-        return response
+        if not ingredients:
+            return HttpResponse('Список покупок пуст.')
+        return shopping_list_response(cache_key, ingredients)
@@ -5,3 +5,6 @@ class TagsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tags'
     verbose_name = 'Управление тегами'
+
+    def ready(self):
+        from . import signals  # noqa
@@ -0,0 +1,2 @@
+TAGS_VERSION_KEY = 'tags_version'
+TAGS_MAX_AGE = 300
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from foodgram.conditional import bump_versions
+
+from .constants import TAGS_VERSION_KEY
+from .models import Tag
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    bump_versions(TAGS_VERSION_KEY)
@@ -1,11 +1,22 @@
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from foodgram.conditional import (ConditionalResponseMixin, get_version,
+                                  version_to_datetime)
+
+from .constants import TAGS_MAX_AGE, TAGS_VERSION_KEY
 from .models import Tag
 from .serializers import TagSerializer
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(ConditionalResponseMixin, ReadOnlyModelViewSet):
     """Вьюсет для вывода списка доступных тегов."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = []
+    cache_control = {'public': True, 'max_age': TAGS_MAX_AGE}
+
+    def get_etag_parts(self, request, *args, **kwargs):
+        return (get_version(TAGS_VERSION_KEY),)
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return version_to_datetime(get_version(TAGS_VERSION_KEY))
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.19 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_subscribe_author_user_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Количество рецептов, опубликованных пользователем', verbose_name='количество рецептов'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='subscribers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Количество пользователей, подписанных на автора', verbose_name='количество подписчиков'),
+        ),
+    ]
@@ -50,6 +50,18 @@ class User(AbstractUser):
         null=True,
         help_text='Роль зарегистрированного пользователя'
     )
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='количество рецептов',
+        default=0,
+        editable=False,
+        help_text='Количество рецептов, опубликованных пользователем'
+    )
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='количество подписчиков',
+        default=0,
+        editable=False,
+        help_text='Количество пользователей, подписанных на автора'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -96,6 +108,12 @@ class Subscribe(models.Model):
                 name='unique_subscribe'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=('author', 'user'),
+                name='subscribe_author_user_idx'
+            )
+        ]
 
     def __str__(self):
         return f'{self.user.email} подписан на {self.author.email}'
@@ -3,6 +3,7 @@ from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
+from recipes.fields import ThumbnailsField
 from recipes.models import Recipe
 
 from .models import Subscribe, User
@@ -67,6 +68,8 @@ class ModifiedUserSerializer(UserSerializer):
         request = self.context.get('request')
         if not request or request.user.is_anonymous:
             return False
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         return obj.subscribers.filter(user=request.user).exists()
 
 
@@ -88,12 +91,15 @@ class PasswordReentrySerializer(serializers.Serializer):
 
 class SubscriptionRecipeSerializer(serializers.ModelSerializer):
     """Наш сериализатор для отображения информации о рецепте."""
+    thumbnails = ThumbnailsField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'thumbnails',
             'cooking_time'
         )
 
@@ -101,7 +107,7 @@ class SubscriptionRecipeSerializer(serializers.ModelSerializer):
 class SubscriptionSerializer(ModifiedUserSerializer):
     """Наш сериализатор для подписки на авторов рецептов."""
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
+    recipes_count = serializers.ReadOnlyField()
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta(UserSerializer.Meta):
@@ -135,16 +141,12 @@ class SubscriptionSerializer(ModifiedUserSerializer):
             )
         return data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
-    def get_is_subscribed(self, obj):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        return obj.subscribers.filter(user=request.user).exists()
-
     def get_recipes(self, obj):
+        recipes_by_author = self.context.get('recipes_by_author')
+        if recipes_by_author is not None:
+            return SubscriptionRecipeSerializer(
+                recipes_by_author[obj.id], many=True
+            ).data
         max_recipes = self.context['request'].GET.get('recipes_limit')
         queryset = obj.recipes.all()
         if max_recipes:
@@ -1,3 +1,6 @@
+from django.db.models import BooleanField, F, Value, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
@@ -5,12 +8,42 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
 from recipes.constants import PAGINATION_SIZE
+from recipes.models import Recipe
+from recipes.pagination import SubscriptionPagination
 
 from .models import Subscribe, User
 from .serializers import (ModifiedUserCreateSerializer, ModifiedUserSerializer,
                           PasswordReentrySerializer, SubscriptionSerializer)
 
 
+def get_recipes_by_author(author_ids, recipes_limit=None):
+    """
+    Загружает превью рецептов сразу для всех авторов страницы.
+    При заданном recipes_limit берет не более recipes_limit последних
+    рецептов каждого автора с помощью ROW_NUMBER() OVER
+    (PARTITION BY author_id) в одном запросе.
+    """
+    recipes = Recipe.objects.filter(author_id__in=author_ids)
+    if recipes_limit:
+        windowed = recipes.annotate(
+            recipe_rank=Window(
+                expression=RowNumber(),
+                partition_by=[F('author_id')],
+                order_by=F('id').desc()
+            )
+        ).values('id', 'recipe_rank')
+        sql, params = windowed.query.sql_with_params()
+        recipes = Recipe.objects.filter(id__in=RawSQL(
+            'SELECT id FROM ({}) AS windowed '
+            'WHERE recipe_rank <= %s'.format(sql),
+            (*params, int(recipes_limit))
+        ))
+    recipes_by_author = {author_id: [] for author_id in author_ids}
+    for recipe in recipes:
+        recipes_by_author[recipe.author_id].append(recipe)
+    return recipes_by_author
+
+
 class UserCreateViewSet(viewsets.ModelViewSet):
     """
     Наш ViewSet для регистрации анонимного пользователя.
@@ -48,9 +81,12 @@ class UserViewSet(viewsets.GenericViewSet):
     )
     def subscriptions(self, request):
         user = request.user
-        subscriptions = User.objects.filter(subscribers__user=user)
-        paginator = PageNumberPagination()
-        paginator.page_size = PAGINATION_SIZE
+        subscriptions = User.objects.filter(
+            subscribers__user=user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).order_by('id')
+        paginator = SubscriptionPagination()
         paginated_subscriptions = paginator.paginate_queryset(
             subscriptions,
             request
@@ -59,7 +95,11 @@ class UserViewSet(viewsets.GenericViewSet):
             paginated_subscriptions,
             many=True,
             context={
-                'request': request
+                'request': request,
+                'recipes_by_author': get_recipes_by_author(
+                    [author.id for author in paginated_subscriptions],
+                    request.GET.get('recipes_limit')
+                )
             }
         )
         return paginator.get_paginated_response(serializer.data)
@@ -97,7 +137,6 @@ class UserViewSet(viewsets.GenericViewSet):
             subscription.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
-        serializer.save()
         Subscribe.objects.create(user=request.user, author=author)
         return Response(
             serializer.data,